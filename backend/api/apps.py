@@ -1,6 +1,30 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_save
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from foodgram.db import check_connections
+        from recipes.deletion import backlog_metrics
+        from rest_framework.authtoken.models import Token
+        from users.counters import users_updated
+
+        from . import authentication
+        from .metrics import metrics
+        request_started.connect(check_connections,
+                                dispatch_uid='check_db_connections')
+        post_delete.connect(authentication.token_deleted, sender=Token,
+                            dispatch_uid='auth_token_deleted')
+        user_model = get_user_model()
+        post_save.connect(authentication.user_changed, sender=user_model,
+                          dispatch_uid='auth_user_saved')
+        post_delete.connect(authentication.user_changed, sender=user_model,
+                            dispatch_uid='auth_user_deleted')
+        users_updated.connect(authentication.users_updated,
+                              dispatch_uid='auth_users_updated')
+        metrics.register_collector(backlog_metrics)
@@ -0,0 +1,147 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from .metrics import metrics
+
+# Бэкенды кеша, данные которых видны только текущему процессу.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache_enabled():
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кешированием пользователя токена.
+    Пользователь ищется сначала в памяти процесса
+    (AUTH_TOKEN_LOCAL_TTL секунд), затем в общем кеше
+    (AUTH_TOKEN_CACHE_TTL секунд) и только потом в базе данных
+    тем же запросом с JOIN, что и в TokenAuthentication.
+    Кеш сбрасывается сигналами: сохранение и удаление пользователя
+    (смена пароля, is_active), изменение счётчиков и мягкое
+    удаление через UPDATE (users_updated) и удаление токена.
+    Сброс повторяется после фиксации транзакции, чтобы не осталась
+    копия, прочитанная конкурентным запросом до фиксации.
+    В остальных процессах старая запись живёт не дольше
+    AUTH_TOKEN_LOCAL_TTL. Кеш, локальный для процесса
+    (LocMemCache), общим не считается и не используется.
+    Запрос получает копию пользователя, поэтому изменения объекта
+    в представлении не попадают в кеш.
+    """
+
+    tokens = {}
+    users = {}
+    lock = threading.Lock()
+    LOCAL_MAXSIZE = 10000
+
+    @staticmethod
+    def cache_key(key):
+        return f'auth_token:{key}'
+
+    @staticmethod
+    def user_cache_key(user_id):
+        return f'auth_user:{user_id}'
+
+    @classmethod
+    def invalidate(cls, keys):
+        """Сбрасывает кешированных пользователей токенов."""
+        keys = list(keys)
+        with cls.lock:
+            for key in keys:
+                cls.tokens.pop(key, None)
+        if shared_cache_enabled():
+            cache.delete_many([cls.cache_key(key) for key in keys])
+
+    @classmethod
+    def invalidate_users(cls, user_ids):
+        """Сбрасывает кешированных пользователей по идентификаторам."""
+        user_ids = list(user_ids)
+        with cls.lock:
+            for user_id in user_ids:
+                cls.users.pop(user_id, None)
+        if shared_cache_enabled():
+            cache.delete_many(
+                [cls.user_cache_key(user_id) for user_id in user_ids])
+
+    def get_user(self, key):
+        """Пользователь токена из кеша или базы."""
+        now = time.monotonic()
+        with self.lock:
+            token = self.tokens.get(key)
+            cached = None
+            if token is not None and token[1] > now:
+                cached = self.users.get(token[0])
+        if cached is not None and cached[1] > now:
+            metrics.inc('auth_token_cache_total', result='local')
+            return cached[0]
+
+        shared = shared_cache_enabled()
+        user = None
+        if shared:
+            user_id = cache.get(self.cache_key(key))
+            if user_id is not None:
+                user = cache.get(self.user_cache_key(user_id))
+        if user is not None:
+            metrics.inc('auth_token_cache_total', result='shared')
+        else:
+            metrics.inc('auth_token_cache_total', result='miss')
+            try:
+                user = Token.objects.select_related('user').get(
+                    key=key).user
+            except Token.DoesNotExist:
+                raise AuthenticationFailed(_('Invalid token.'))
+            if shared:
+                cache.set_many({
+                    self.cache_key(key): user.pk,
+                    self.user_cache_key(user.pk): user,
+                }, settings.AUTH_TOKEN_CACHE_TTL)
+        expires = now + settings.AUTH_TOKEN_LOCAL_TTL
+        with self.lock:
+            if len(self.tokens) >= self.LOCAL_MAXSIZE:
+                self.tokens.clear()
+                self.users.clear()
+            self.tokens[key] = (user.pk, expires)
+            self.users[user.pk] = (user, expires)
+        return user
+
+    def authenticate_credentials(self, key):
+        user = copy.copy(self.get_user(key))
+        if not user.is_active:
+            self.invalidate((key,))
+            self.invalidate_users((user.pk,))
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return user, Token(key=key, user=user)
+
+
+def invalidate_users(user_ids):
+    CachedTokenAuthentication.invalidate_users(user_ids)
+    transaction.on_commit(
+        lambda: CachedTokenAuthentication.invalidate_users(user_ids))
+
+
+def token_deleted(sender, instance, **kwargs):
+    """Выход из системы и удаление токена сбрасывают кеш."""
+    CachedTokenAuthentication.invalidate((instance.key,))
+
+
+def user_changed(sender, instance, **kwargs):
+    """Сохранение и удаление пользователя сбрасывают кеш."""
+    invalidate_users((instance.pk,))
+
+
+def users_updated(sender, ids, **kwargs):
+    """UPDATE пользователей в обход save() сбрасывает кеш."""
+    invalidate_users(ids)
@@ -0,0 +1,188 @@
+"""
+Выполнение пакета запросов к API внутри процесса.
+Подзапросы вызывают те же вьюсеты, что и обычные запросы, с уже
+выполненной аутентификацией внешнего запроса. Идущие подряд
+GET-запросы выполняются параллельно, запросы на изменение -
+последовательно в порядке пакета.
+"""
+import contextvars
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.urls import Resolver404, resolve
+
+SAFE_METHODS = ('GET', 'HEAD')
+ALLOWED_METHODS = ('GET', 'HEAD', 'POST', 'PATCH', 'PUT', 'DELETE')
+BATCH_PATH = '/api/batch/'
+
+logger = logging.getLogger(__name__)
+
+# Общий для процесса пул: число потоков, а значит и соединений
+# с базой у GET-подзапросов, ограничено BATCH_MAX_WORKERS.
+executor = ThreadPoolExecutor(max_workers=settings.BATCH_MAX_WORKERS,
+                              thread_name_prefix='batch')
+
+
+class BatchState:
+    """
+    Состояние просматривающего пользователя, общее для подзапросов
+    пакета: например, отпечатки его избранного и корзины.
+    Сбрасывается после каждого запроса на изменение.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def get(self, name, build):
+        with self.lock:
+            if name in self.values:
+                return self.values[name]
+        value = build()
+        with self.lock:
+            return self.values.setdefault(name, value)
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+
+def viewer_state(request, name, build):
+    """
+    Возвращает значение из состояния пакета, если запрос выполняется
+    в составе пакета, иначе вычисляет его.
+    """
+    state = getattr(request, 'batch_state', None)
+    if state is None:
+        return build()
+    return state.get(name, build)
+
+
+def validate(items, max_requests):
+    """Возвращает текст ошибки для некорректного пакета или None."""
+    if not isinstance(items, list) or not items:
+        return 'Ожидается непустой список запросов.'
+    if len(items) > max_requests:
+        return f'Не больше {max_requests} запросов в пакете.'
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(
+                item.get('path'), str):
+            return 'Каждый запрос должен содержать path.'
+        path = urlsplit(item['path']).path
+        if not path.startswith('/api/') or path == BATCH_PATH:
+            return f'Недопустимый адрес {item["path"]}.'
+        if item.get('method', 'GET').upper() not in ALLOWED_METHODS:
+            return f'Недопустимый метод {item["method"]}.'
+    return None
+
+
+def build_request(outer, item, state):
+    """Строит подзапрос с аутентификацией внешнего запроса."""
+    url = urlsplit(item['path'])
+    body = b''
+    if item.get('body') is not None:
+        body = json.dumps(item['body']).encode()
+    environ = {
+        key: value for key, value in outer.META.items()
+        if not key.startswith(('HTTP_IF_', 'CONTENT_', 'wsgi.input'))
+    }
+    environ.update({
+        'REQUEST_METHOD': item.get('method', 'GET').upper(),
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    })
+    for header, value in (item.get('headers') or {}).items():
+        environ['HTTP_' + header.upper().replace('-', '_')] = str(value)
+    request = WSGIRequest(environ)
+    request._force_auth_user = outer.user
+    request._force_auth_token = outer.auth
+    request.batch_state = state
+    return request
+
+
+def execute(request):
+    """Выполняет подзапрос и возвращает его результат."""
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return {'status': 404, 'headers': {}, 'body': None}
+    request.resolver_match = match
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception('Ошибка подзапроса %s %s',
+                         request.method, request.get_full_path())
+        return {'status': 500, 'headers': {}, 'body': None}
+    if hasattr(response, 'render'):
+        response.render()
+    if response.streaming:
+        content = b''.join(response.streaming_content)
+    else:
+        content = response.content
+    body = content.decode() if content else None
+    if body and response.get('Content-Type', '').startswith(
+            'application/json'):
+        body = json.loads(body)
+    return {
+        'status': response.status_code,
+        'headers': {
+            header: response[header]
+            for header in ('ETag', 'Last-Modified', 'Location')
+            if response.has_header(header)
+        },
+        'body': body,
+    }
+
+
+def execute_in_thread(request):
+    """
+    Выполняет подзапрос в потоке общего пула. Соединения потока
+    с базой живут между подзапросами, как соединения обработчиков
+    обычных запросов: закрываются только устаревшие и неисправные.
+    """
+    close_old_connections()
+    try:
+        return execute(request)
+    finally:
+        close_old_connections()
+
+
+def run_batch(outer, items):
+    """Выполняет пакет и возвращает результаты в порядке запросов."""
+    state = BatchState()
+    requests = [build_request(outer, item, state) for item in items]
+    results = [None] * len(requests)
+    position = 0
+    while position < len(requests):
+        end = position
+        while (end < len(requests)
+               and requests[end].method in SAFE_METHODS):
+            end += 1
+        if end > position:
+            futures = {
+                index: executor.submit(
+                    contextvars.copy_context().run,
+                    execute_in_thread, requests[index])
+                for index in range(position, end)
+            }
+            for index, future in futures.items():
+                results[index] = future.result()
+            position = end
+        else:
+            results[position] = execute(requests[position])
+            state.clear()
+            position += 1
+    return [
+        {'id': item.get('id', index), **result}
+        for index, (item, result) in enumerate(zip(items, results))
+    ]
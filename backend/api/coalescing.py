@@ -0,0 +1,48 @@
+"""
+Объединение одинаковых одновременных вычислений (single-flight):
+пока ведущий поток вычисляет значение для ключа, остальные потоки
+с тем же ключом ждут и получают его результат.
+"""
+import threading
+
+from .metrics import metrics
+
+
+class Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Группа вычислений, объединяемых по ключу."""
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func):
+        """Вычисляет func() один раз для всех одновременных вызовов key."""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+        if not leader:
+            metrics.inc('coalesced_requests_total', group=self.name)
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+        return call.result
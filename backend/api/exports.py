@@ -0,0 +1,95 @@
+"""
+Потоковая генерация выгрузок: строки файла формируются генераторами
+по мере чтения данных из базы через iterator(), без сборки всего
+содержимого в памяти.
+"""
+import csv
+import tempfile
+from itertools import groupby
+
+from django.core.files import File
+from django.db.models import F, Sum
+from recipes.models import ExportJob, Recipe, RecipesIngredients
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Псевдофайл для csv.writer: writerow возвращает готовую строку."""
+
+    def write(self, value):
+        return value
+
+
+csv_writer = csv.writer(Echo())
+
+
+def shopping_list_lines(user, file_format=ExportJob.TXT):
+    """Список покупок: суммарное количество каждого ингредиента."""
+    rows = RecipesIngredients.objects.filter(
+        recipe__shopping_cart__user=user, recipe__deleted_at__isnull=True
+    ).values(
+        name=F('ingredient__name'),
+        units=F('ingredient__measurement_unit')
+    ).order_by('ingredient__name').annotate(
+        total=Sum('amount')
+    ).iterator(chunk_size=CHUNK_SIZE)
+    if file_format == ExportJob.CSV:
+        yield csv_writer.writerow(
+            ('Ингредиент', 'Количество', 'Единица измерения'))
+        for row in rows:
+            yield csv_writer.writerow(
+                (row['name'], row['total'], row['units']))
+        return
+    yield 'Список покупок: \n\n'
+    for row in rows:
+        yield f'{row["name"]}: {row["total"]}, {row["units"]}.\n'
+
+
+def recipe_book_lines(recipes, file_format=ExportJob.TXT):
+    """Книга рецептов: рецепты с ингредиентами и описанием."""
+    items = RecipesIngredients.objects.filter(
+        recipe__in=recipes
+    ).order_by('recipe__name', 'recipe_id', 'id').values_list(
+        'recipe_id', 'recipe__name', 'recipe__cooking_time',
+        'recipe__text', 'ingredient__name',
+        'ingredient__measurement_unit', 'amount'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    if file_format == ExportJob.CSV:
+        yield csv_writer.writerow(
+            ('Рецепт', 'Время приготовления', 'Ингредиент', 'Количество',
+             'Единица измерения'))
+        for _, name, cooking_time, _, ingredient, units, amount in items:
+            yield csv_writer.writerow(
+                (name, cooking_time, ingredient, amount, units))
+        return
+    for _, group in groupby(items, key=lambda item: item[0]):
+        first = next(group)
+        _, name, cooking_time, text = first[:4]
+        yield f'{name}\nВремя приготовления: {cooking_time} мин.\n\n'
+        for item in (first, *group):
+            yield f'- {item[4]}: {item[6]}, {item[5]}.\n'
+        yield f'\n{text}\n\n'
+
+
+def export_lines(job):
+    """Строки файла для задания на выгрузку."""
+    if job.kind == ExportJob.SHOPPING_LIST:
+        return shopping_list_lines(job.user, job.format)
+    if job.kind == ExportJob.MY_RECIPES:
+        recipes = Recipe.objects.filter(author=job.user)
+    else:
+        recipes = Recipe.objects.filter(favorites__user=job.user)
+    return recipe_book_lines(recipes, job.format)
+
+
+def write_export(job):
+    """
+    Записывает выгрузку во временный файл и сохраняет его в хранилище
+    медиафайлов. Скачивается файл через ExportJobViewSet.download.
+    """
+    with tempfile.TemporaryFile('w+b') as temp:
+        for line in export_lines(job):
+            temp.write(line.encode('utf-8'))
+        temp.seek(0)
+        job.file.save(f'{job.kind}.{job.format}', File(temp), save=False)
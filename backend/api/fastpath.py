@@ -0,0 +1,188 @@
+"""
+Быстрый путь чтения для нагруженных списков.
+Строки собираются запросами values() в обычные словари той же схемы,
+что отдают RecipeGetSerializer и IngredientSerializer, без
+пополевого to_representation сериализаторов.
+"""
+import threading
+from collections import OrderedDict, defaultdict
+
+from recipes.models import Recipe, RecipesIngredients
+from rest_framework import serializers
+from users.models import User
+
+from .coalescing import SingleFlight
+from .serializers import RecipeGetSerializer
+
+RECIPE_COLUMNS = ('id', 'name', 'image', 'text', 'cooking_time',
+                  'pub_date', 'updated_at', 'is_favorited',
+                  'is_in_shopping_cart')
+RECIPE_FIELDS = RecipeGetSerializer.Meta.fields
+AUTHOR_FIELDS = ('id', 'email', 'username', 'first_name', 'last_name',
+                 'is_subscribed', 'recipes_count', 'followers_count',
+                 'following_count')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit')
+
+datetime_field = serializers.DateTimeField()
+image_storage = Recipe._meta.get_field('image').storage
+
+
+class ReferenceCache:
+    """
+    Кеш справочных данных в памяти процесса с вытеснением
+    давно неиспользуемых ключей. Значение действительно, пока
+    совпадает отпечаток версии данных. Одновременные промахи
+    по одному ключу и отпечатку пересобирают значение один раз.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.flight = SingleFlight('reference_cache')
+
+    def get(self, key, stamp, build):
+        """Возвращает значение для ключа, пересобирая его при смене stamp."""
+        with self.lock:
+            cached = self.data.get(key)
+            if cached is not None and cached[0] == stamp:
+                self.data.move_to_end(key)
+                return cached[1]
+        value = self.flight.do((key, repr(stamp)), build)
+        with self.lock:
+            self.data[key] = (stamp, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+        return value
+
+
+reference_cache = ReferenceCache()
+
+
+def image_url(name, request=None):
+    """Повторяет ImageField.to_representation для имени файла."""
+    if not name:
+        return None
+    url = image_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def recipe_values(queryset, fields=None):
+    """
+    Возвращает values()-запрос с колонками рецепта, нужными для полей.
+    Ожидает queryset, аннотированный RecipeQuerySet.with_user_state.
+    """
+    columns = [name for name in RECIPE_COLUMNS
+               if fields is None or name in fields or name == 'id']
+    if fields is None or 'author' in fields:
+        columns.append('author_id')
+    return queryset.values(*columns)
+
+
+def recipe_rows(rows, request, fields=None):
+    """
+    Достраивает строки из recipe_values() до схемы RecipeGetSerializer:
+    авторы, теги и ингредиенты загружаются одним запросом каждый.
+    """
+    rows = list(rows)
+    ids = [row['id'] for row in rows]
+    wanted = RECIPE_FIELDS if fields is None else [
+        name for name in RECIPE_FIELDS if name in fields]
+
+    authors = {}
+    if 'author' in wanted:
+        authors = {
+            author['id']: author for author in User.objects.filter(
+                id__in={row['author_id'] for row in rows}
+            ).values(*AUTHOR_FIELDS)
+        }
+    tags = defaultdict(list)
+    if 'tags' in wanted:
+        for tag in Recipe.tags.through.objects.filter(
+            recipe_id__in=ids
+        ).order_by('recipe_id', 'tag_id').values_list(
+            'recipe_id', 'tag_id', 'tag__name', 'tag__color', 'tag__slug'
+        ):
+            tags[tag[0]].append(
+                {'id': tag[1], 'name': tag[2], 'color': tag[3],
+                 'slug': tag[4]})
+    ingredients = defaultdict(list)
+    if 'ingredients' in wanted:
+        for item in RecipesIngredients.objects.filter(
+            recipe_id__in=ids
+        ).order_by('id').values_list(
+            'recipe_id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        ):
+            ingredients[item[0]].append(
+                {'name': item[1], 'measurement_unit': item[2],
+                 'amount': item[3]})
+
+    result = []
+    for row in rows:
+        recipe_id = row['id']
+        values = {
+            'id': recipe_id,
+            'tags': tags[recipe_id],
+            'author': authors.get(row.get('author_id')),
+            'ingredients': ingredients[recipe_id],
+            'is_favorited': row.get('is_favorited'),
+            'is_in_shopping_cart': row.get('is_in_shopping_cart'),
+            'image': image_url(row.get('image'), request),
+            'name': row.get('name'),
+            'text': row.get('text'),
+            'cooking_time': row.get('cooking_time'),
+            'pub_date': datetime_field.to_representation(
+                row.get('pub_date')),
+            'updated_at': datetime_field.to_representation(
+                row.get('updated_at')),
+        }
+        result.append({name: values[name] for name in wanted})
+    return result
+
+
+def ingredient_rows(queryset):
+    """Строки схемы IngredientSerializer."""
+    return list(queryset.values(*INGREDIENT_FIELDS))
+
+
+def subscription_rows(author_ids, request, fields=None):
+    """
+    Строки списка подписок для страницы авторов: профили авторов
+    и их рецепты загружаются одним запросом каждый, количество
+    рецептов берётся из счётчика автора. Адреса картинок, как
+    и в сериализаторе, абсолютные.
+    """
+    authors = {
+        author['id']: author for author in User.objects.filter(
+            id__in=author_ids
+        ).values('email', 'id', 'username', 'first_name', 'last_name',
+                 'recipes_count')
+    }
+    recipes = defaultdict(list)
+    if fields is None or 'recipes' in fields:
+        for recipe in Recipe.objects.filter(
+            author_id__in=author_ids
+        ).order_by('-pub_date').values(
+            'author_id', 'id', 'name', 'image', 'cooking_time'
+        ):
+            recipes[recipe['author_id']].append({
+                'id': recipe['id'],
+                'name': recipe['name'],
+                'image': image_url(recipe['image'], request),
+                'cooking_time': recipe['cooking_time'],
+            })
+
+    result = []
+    for author_id in author_ids:
+        row = authors[author_id]
+        row['is_subscribed'] = True
+        row['recipes'] = recipes[author_id]
+        if fields is not None:
+            row = {name: value for name, value in row.items()
+                   if name in fields}
+        result.append(row)
+    return result
@@ -18,23 +18,55 @@ class IngredientFilter(django_filters.FilterSet):
 
 
 class RecipeFilter(filters.FilterSet):
+    ALL_TAGS = '__all__'
+    TRENDING = 'trending'
+
     tags = filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
         queryset=Tag.objects.all(),
     )
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
+    is_favorited = filters.BooleanFilter(method='filter_user_state')
+    is_in_shopping_cart = filters.BooleanFilter(method='filter_user_state')
+    ordering = filters.ChoiceFilter(
+        choices=((TRENDING, 'По популярности'),),
+        method='filter_ordering',
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author')
+        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart',
+                  'ordering')
+
+    def __init__(self, data=None, *args, **kwargs):
+        self.all_tags = False
+        if data is not None and self.ALL_TAGS in data.getlist('tags', ()):
+            data = data.copy()
+            data.pop('tags')
+            self.all_tags = True
+        super().__init__(data, *args, **kwargs)
+
+    def filter_user_state(self, queryset, name, value):
+        """
+        Фильтрует по аннотациям из RecipeQuerySet.with_user_state,
+        поэтому условие попадает в тот же SQL-запрос, что и остальные
+        фильтры. Фронтенд передаёт флаги как 0/1.
+        """
+        if value is None:
+            return queryset
+        return queryset.filter(**{name: value})
+
+    def filter_ordering(self, queryset, name, value):
+        """Популярные рецепты: по индексу trending_score."""
+        if value == self.TRENDING:
+            return queryset.order_by('-trending_score', '-pk')
+        return queryset
 
     def filter_queryset(self, queryset):
-        print("FILTERING")
         tags = self.data.get('tags')
-        if tags and tags == "__all__":
-            return queryset
-        pk_in_kwargs = self.request.resolver_match.kwargs.get('pk')
-        if not tags and not pk_in_kwargs:
-            return Recipe.objects.none()
+        match = getattr(self.request, 'resolver_match', None)
+        pk_in_kwargs = match.kwargs.get('pk') if match else None
+        if not tags and not self.all_tags and not pk_in_kwargs:
+            return queryset.none()
         return super().filter_queryset(queryset)
@@ -0,0 +1,44 @@
+import time
+
+from api.fastpath import recipe_rows, recipe_values
+from api.renderers import FastJSONRenderer
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from foodgram.compression import ENCODERS, compress
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Измеряет размер ответа и процессорное время сжатия '
+            'страницы рецептов для каждой доступной кодировки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100,
+                            help='Количество рецептов на странице.')
+        parser.add_argument('--repeat', type=int, default=50,
+                            help='Количество повторов замера.')
+
+    def handle(self, *args, **options):
+        count, repeat = options['count'], options['repeat']
+        host = next((host for host in settings.ALLOWED_HOSTS
+                     if host and '*' not in host), 'localhost')
+        request = RequestFactory().get('/api/recipes/', HTTP_HOST=host)
+        request.user = AnonymousUser()
+        queryset = Recipe.objects.with_user_state(request.user)[:count]
+        rows = recipe_rows(recipe_values(queryset), request)
+        if not rows:
+            raise CommandError('Нет рецептов для замера.')
+        body = FastJSONRenderer().render({'results': rows})
+        self.stdout.write(f'identity: {len(rows)} рецептов, '
+                          f'{len(body)} байт')
+        for encoding, encoder in ENCODERS.items():
+            started = time.process_time()
+            for _ in range(repeat):
+                compressed = compress(encoder, body)
+            cpu = (time.process_time() - started) / repeat
+            self.stdout.write(
+                f'{encoding}: {len(compressed)} байт '
+                f'({len(compressed) / len(body):.1%}), '
+                f'{cpu * 1000:.2f} мс процессорного времени')
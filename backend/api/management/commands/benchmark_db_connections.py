@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает задержку запросов к API с закрытием соединения '
+            'после каждого запроса и с постоянным соединением.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Количество запросов в каждом режиме.')
+        parser.add_argument('--path', default='/api/tags/',
+                            help='Адрес, на который отправляются запросы.')
+
+    def run(self, path, count, conn_max_age):
+        conn = connections[DEFAULT_DB_ALIAS]
+        conn.close()
+        conn.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connects = []
+
+        def on_connect(sender, connection, **kwargs):
+            connects.append(connection.alias)
+
+        connection_created.connect(on_connect)
+        host = next((host for host in settings.ALLOWED_HOSTS
+                     if host and '*' not in host), 'localhost')
+        client = Client(HTTP_HOST=host)
+        try:
+            started = time.perf_counter()
+            for _ in range(count):
+                client.get(path)
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(on_connect)
+            conn.close()
+        return elapsed / count, len(connects)
+
+    def handle(self, *args, **options):
+        count, path = options['requests'], options['path']
+        conn_max_age = connections[DEFAULT_DB_ALIAS].settings_dict[
+            'CONN_MAX_AGE']
+        try:
+            for name, max_age in (('без постоянных соединений', 0),
+                                  ('с постоянным соединением', None)):
+                latency, connects = self.run(path, count, max_age)
+                self.stdout.write(
+                    f'{name}: {latency * 1000:.2f} мс на запрос, '
+                    f'{connects} подключений на {count} запросов'
+                )
+        finally:
+            connections[DEFAULT_DB_ALIAS].settings_dict[
+                'CONN_MAX_AGE'] = conn_max_age
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from foodgram.middleware import MiddlewareStack
+
+
+class Command(BaseCommand):
+    help = ('Измеряет накладные расходы полной цепочки middleware '
+            'и цепочки для API на один запрос.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000,
+                            help='Количество запросов в каждом режиме.')
+        parser.add_argument('--path', default='/api/recipes/',
+                            help='Адрес запроса.')
+
+    def run(self, paths, path, count):
+        response = HttpResponse(b'{}', content_type='application/json')
+        stack = MiddlewareStack(paths, lambda request: response)
+        host = next((host for host in settings.ALLOWED_HOSTS
+                     if host and '*' not in host), 'localhost')
+        factory = RequestFactory(HTTP_HOST=host)
+        requests = [factory.get(path) for _ in range(count)]
+        started = time.perf_counter()
+        for request in requests:
+            stack.handler(request)
+        return (time.perf_counter() - started) / count
+
+    def handle(self, *args, **options):
+        count, path = options['requests'], options['path']
+        results = {}
+        for name, paths in (('полная цепочка', settings.FULL_MIDDLEWARE),
+                            ('цепочка API', settings.API_MIDDLEWARE)):
+            results[name] = self.run(paths, path, count)
+            self.stdout.write(
+                f'{name}: {len(paths)} middleware, '
+                f'{results[name] * 1000000:.1f} мкс на запрос')
+        saved = results['полная цепочка'] - results['цепочка API']
+        self.stdout.write(f'Экономия: {saved * 1000000:.1f} мкс на запрос')
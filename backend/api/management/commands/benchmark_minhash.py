@@ -0,0 +1,91 @@
+import random
+import time
+from collections import defaultdict
+
+from api.minhash import band_buckets, estimate, signature
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает поиск похожих рецептов через MinHash/LSH '
+            'с точным перебором коэффициента Жаккара на синтетических '
+            'наборах ингредиентов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=2000,
+                            help='Размер справочника ингредиентов.')
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--threshold', type=float, default=0.5)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def generate(self, rng, count, vocabulary):
+        """Наборы ингредиентов; каждый десятый - вариация предыдущего."""
+        recipes = []
+        for number in range(count):
+            if number and number % 10 == 0:
+                base = set(rng.choice(recipes))
+                base.discard(rng.choice(sorted(base)))
+                base.add(rng.randrange(vocabulary))
+                recipes.append(frozenset(base))
+            else:
+                size = min(max(1, int(rng.gauss(8, 3))), 20)
+                recipes.append(frozenset(
+                    rng.randrange(vocabulary) for _ in range(size)))
+        return recipes
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        threshold = options['threshold']
+        recipes = self.generate(
+            rng, options['recipes'], options['ingredients'])
+
+        started = time.perf_counter()
+        signatures = [signature(ingredients) for ingredients in recipes]
+        buckets = defaultdict(list)
+        for index, values in enumerate(signatures):
+            for key in band_buckets(values):
+                buckets[key].append(index)
+        build_time = time.perf_counter() - started
+
+        queries = rng.sample(range(len(recipes)), options['queries'])
+        exact_time = lsh_time = 0
+        candidates_total = found = expected = 0
+        for query in queries:
+            started = time.perf_counter()
+            target = recipes[query]
+            exact = {
+                index for index, ingredients in enumerate(recipes)
+                if index != query and len(target & ingredients)
+                / len(target | ingredients) >= threshold
+            }
+            exact_time += time.perf_counter() - started
+
+            started = time.perf_counter()
+            candidates = {
+                index for key in band_buckets(signatures[query])
+                for index in buckets[key] if index != query
+            }
+            approximate = {
+                index for index in candidates
+                if estimate(signatures[query], signatures[index])
+                >= threshold
+            }
+            lsh_time += time.perf_counter() - started
+            candidates_total += len(candidates)
+            expected += len(exact)
+            found += len(exact & approximate)
+
+        count = len(queries)
+        self.stdout.write(
+            f'Построение индекса для {len(recipes)} рецептов: '
+            f'{build_time:.1f} с')
+        self.stdout.write(
+            f'Точный перебор: {exact_time / count * 1000:.1f} мс на запрос')
+        self.stdout.write(
+            f'MinHash/LSH: {lsh_time / count * 1000:.2f} мс на запрос, '
+            f'{candidates_total / count:.1f} кандидатов')
+        recall = found / expected if expected else 1.0
+        self.stdout.write(
+            f'Полнота при сходстве от {threshold}: {recall:.1%} '
+            f'({found} из {expected})')
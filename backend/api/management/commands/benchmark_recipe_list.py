@@ -0,0 +1,74 @@
+import json
+import time
+
+from api.fastpath import recipe_rows, recipe_values
+from api.renderers import FastJSONRenderer
+from api.serializers import RecipeGetSerializer
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from recipes.models import Recipe
+from rest_framework.renderers import JSONRenderer
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время сериализации и рендеринга страницы рецептов '
+            'через RecipeGetSerializer и через быстрый путь.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100,
+                            help='Количество рецептов на странице.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Количество повторов замера.')
+
+    def measure(self, build, render, repeat):
+        build_time = render_time = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = build()
+            built = time.perf_counter()
+            body = render(data)
+            build_time += built - started
+            render_time += time.perf_counter() - built
+        return build_time / repeat, render_time / repeat, body
+
+    def handle(self, *args, **options):
+        count, repeat = options['count'], options['repeat']
+        host = next((host for host in settings.ALLOWED_HOSTS
+                     if host and '*' not in host), 'localhost')
+        request = RequestFactory().get('/api/recipes/', HTTP_HOST=host)
+        request.user = AnonymousUser()
+        base = Recipe.objects.with_user_state(request.user)
+        ids = list(base.values_list('id', flat=True)[:count])
+        if not ids:
+            raise CommandError('Нет рецептов для замера.')
+
+        def serializer_build():
+            queryset = base.filter(id__in=ids).select_related(
+                'author').prefetch_related(
+                'tags', 'recipes_ingredients__ingredient')
+            return RecipeGetSerializer(
+                queryset, many=True, context={'request': request}).data
+
+        def fast_build():
+            return recipe_rows(
+                recipe_values(base.filter(id__in=ids)), request)
+
+        results = {
+            'serializer': self.measure(
+                serializer_build, JSONRenderer().render, repeat),
+            'fastpath': self.measure(
+                fast_build, FastJSONRenderer().render, repeat),
+        }
+        if (json.loads(results['serializer'][2])
+                != json.loads(results['fastpath'][2])):
+            raise CommandError('Ответы быстрого пути и сериализатора '
+                               'не совпадают.')
+        for name, (build_time, render_time, body) in results.items():
+            self.stdout.write(
+                f'{name}: {len(ids)} рецептов, '
+                f'сборка {build_time * 1000:.2f} мс, '
+                f'рендеринг {render_time * 1000:.2f} мс, '
+                f'{len(body)} байт'
+            )
@@ -0,0 +1,93 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = ('Измеряет время от запуска gunicorn до первого успешно '
+            'обслуженного запроса.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/tags/',
+                            help='Адрес первого запроса.')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Количество запусков.')
+        parser.add_argument('--timeout', type=float, default=60,
+                            help='Максимальное время ожидания, с.')
+        parser.add_argument('--init', action='store_true',
+                            help='Выполнять init.sh перед запуском, как '
+                                 'entrypoint.sh с RUN_INIT=1.')
+        parser.add_argument('--output',
+                            help='Файл для сохранения результатов в JSON.')
+        parser.add_argument('gunicorn_args', nargs='*',
+                            help='Дополнительные аргументы gunicorn после '
+                                 '--, например -- --workers=2 --preload.')
+
+    def start(self, port, options):
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                   '--bind', f'127.0.0.1:{port}', *options['gunicorn_args']]
+        if options['init']:
+            command = ['bash', '-c',
+                       './init.sh && exec "$@"', 'init', *command]
+        return subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=os.environ.copy(),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def wait_first_response(self, url, process, timeout):
+        host = next((host for host in settings.ALLOWED_HOSTS
+                     if host and '*' not in host), 'localhost')
+        request = urllib.request.Request(url, headers={'Host': host})
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError('gunicorn завершился до первого ответа.')
+            try:
+                with urllib.request.urlopen(request, timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.01)
+        raise CommandError('Превышено время ожидания первого ответа.')
+
+    def handle(self, *args, **options):
+        timings = []
+        for _ in range(options['repeat']):
+            port = free_port()
+            started = time.monotonic()
+            process = self.start(port, options)
+            try:
+                self.wait_first_response(
+                    f'http://127.0.0.1:{port}{options["path"]}',
+                    process, options['timeout'])
+                timings.append(time.monotonic() - started)
+            finally:
+                process.terminate()
+                process.wait()
+        result = {
+            'gunicorn_args': options['gunicorn_args'],
+            'init': options['init'],
+            'runs': timings,
+            'best': min(timings),
+            'mean': sum(timings) / len(timings),
+        }
+        self.stdout.write(
+            f'Запуск до первого ответа: лучший {result["best"]:.3f} с, '
+            f'средний {result["mean"]:.3f} с'
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,68 @@
+import time
+
+from api.authentication import CachedTokenAuthentication
+from api.views import UserViewset
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает количество запросов к базе и задержку '
+            'TokenAuthentication и CachedTokenAuthentication: '
+            'отдельно аутентификации и полного запроса '
+            'GET /api/users/me/.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000,
+                            help='Количество запросов в каждом режиме.')
+
+    @staticmethod
+    def measure(func, count):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(count):
+                func()
+            elapsed = time.perf_counter() - started
+        return elapsed / count, len(queries) / count
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        token = Token.objects.first()
+        if token is None:
+            raise CommandError('Нет токенов; выполните вход в API '
+                               'или команду loadtest.')
+        factory = RequestFactory()
+        header = f'Token {token.key}'
+
+        def authenticate(authentication):
+            return lambda: authentication.authenticate(Request(
+                factory.get('/api/users/me/', HTTP_AUTHORIZATION=header)))
+
+        def me(authentication_class):
+            view = UserViewset.as_view(
+                {'get': 'me'}, authentication_classes=(authentication_class,))
+            return lambda: view(factory.get(
+                '/api/users/me/', HTTP_AUTHORIZATION=header)).render()
+
+        CachedTokenAuthentication.invalidate((token.key,))
+        results = []
+        for name, authentication_class in (
+                ('TokenAuthentication', TokenAuthentication),
+                ('CachedTokenAuthentication', CachedTokenAuthentication)):
+            # Первый вызов заполняет кеш и в замеры не входит.
+            authenticate(authentication_class())()
+            for target, func in (
+                    ('аутентификация', authenticate(authentication_class())),
+                    ('GET /api/users/me/', me(authentication_class))):
+                latency, queries = self.measure(func, count)
+                results.append((target, name, latency, queries))
+        for target, name, latency, queries in sorted(
+                results, key=lambda row: row[0]):
+            self.stdout.write(
+                f'{target}, {name}: {latency * 1000000:.1f} мкс '
+                f'на запрос, {queries:.3f} запросов к базе на запрос')
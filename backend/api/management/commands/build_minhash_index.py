@@ -0,0 +1,19 @@
+import time
+
+from api.minhash import rebuild_index
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает MinHash-сигнатуры и LSH-индекс рецептов, '
+            'например после generate_fixture_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = rebuild_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано рецептов: {total} '
+            f'за {time.monotonic() - started:.1f} с'))
@@ -0,0 +1,39 @@
+import time
+
+from api.recommendations import build_recommendations
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает похожие рецепты по избранному и корзинам '
+            'пользователей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=20,
+                            help='Количество похожих рецептов на рецепт.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Количество рецептов в пачке расчёта.')
+        parser.add_argument('--max-nnz', type=int, default=5000000,
+                            help='Предел ненулевых элементов произведения '
+                                 'в блоке расчёта.')
+        parser.add_argument('--min-interactions', type=int, default=2,
+                            help='Минимум взаимодействий с рецептом.')
+        parser.add_argument('--only-new', action='store_true',
+                            help='Считать только рецепты без соседей.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            processed = build_recommendations(
+                top_k=options['top_k'],
+                batch_size=options['batch_size'],
+                min_interactions=options['min_interactions'],
+                only_new=options['only_new'],
+                max_nnz=options['max_nnz'],
+            )
+        except ImportError as error:
+            raise CommandError(
+                f'Для расчёта нужны numpy и scipy: {error}') from error
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецептов обработано: {processed} '
+            f'за {time.monotonic() - started:.1f} с'))
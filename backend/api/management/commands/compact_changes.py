@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes.changelog import compact
+
+
+class Command(BaseCommand):
+    help = ('Сжимает журнал изменений: оставляет только последнюю '
+            'запись по каждому объекту.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.CHANGES_COMPACT_BATCH_SIZE,
+            help='Номеров журнала в одной транзакции.')
+
+    def handle(self, *args, **options):
+        deleted = compact(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено записей журнала: {deleted}'))
@@ -0,0 +1,182 @@
+import itertools
+import random
+import struct
+import time
+import zlib
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from recipes.models import (Favorite, Ingredient, Recipe, RecipesIngredients,
+                            ShoppingCart, Tag)
+from users.counters import reconcile_counters
+from users.models import Subscription, User
+
+IMAGE_NAME = 'recipes/images/fixture.png'
+WORDS = ('суп', 'салат', 'пирог', 'каша', 'рагу', 'запеканка', 'омлет',
+         'паста', 'плов', 'оладьи', 'котлеты', 'соус', 'борщ', 'десерт')
+
+
+def placeholder_png(width=64, height=64, color=(230, 160, 80)):
+    """Однотонная PNG-картинка без зависимости от Pillow."""
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    row = b'\x00' + bytes(color) * width
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height,
+                                         8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(row * height))
+            + chunk(b'IEND', b''))
+
+
+def zipf_weights(size, exponent):
+    """Накопленные веса распределения Ципфа для рангов 1..size."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+class Command(BaseCommand):
+    help = ('Создаёт синтетические данные для нагрузочного тестирования: '
+            'пользователей, рецепты, избранное, корзины и подписки '
+            'с распределением популярности по закону Ципфа.')
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--favorites', type=int, default=100000)
+        parser.add_argument('--carts', type=int, default=20000)
+        parser.add_argument('--subscriptions', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help='Показатель распределения популярности.')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Начальное значение генератора.')
+
+    def bulk_create(self, model, objects, batch_size):
+        """Вставляет объекты пачками, пропуская нарушения уникальности."""
+        started = time.monotonic()
+        created = 0
+        objects = iter(objects)
+        while True:
+            batch = list(itertools.islice(objects, batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    batch, batch_size=batch_size, ignore_conflicts=True)
+            created += len(batch)
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {created} '
+            f'за {time.monotonic() - started:.1f} с')
+
+    def pairs(self, rng, count, left_ids, right_ids, exponent,
+              distinct=False):
+        """
+        Уникальные пары (left, right): правая сторона выбирается
+        по Ципфу, так что немногие объекты получают большую часть связей.
+        distinct исключает пары из одинаковых значений.
+        """
+        weights = zipf_weights(len(right_ids), exponent)
+        seen = set()
+        attempts = 0
+        while len(seen) < count and attempts < count * 3:
+            left = rng.choices(left_ids, k=min(count, 10000))
+            right = rng.choices(right_ids, cum_weights=weights,
+                                k=len(left))
+            for pair in zip(left, right):
+                attempts += 1
+                if distinct and pair[0] == pair[1] or pair in seen:
+                    continue
+                seen.add(pair)
+                yield pair
+                if len(seen) >= count:
+                    return
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        exponent = options['zipf']
+
+        ingredient_ids = list(Ingredient.objects.order_by('id').values_list(
+            'id', flat=True))
+        if not ingredient_ids:
+            raise CommandError('Нет ингредиентов; выполните load_ingredients.')
+        if not Tag.objects.exists():
+            call_command('load_tags')
+        tag_ids = list(Tag.objects.order_by('id').values_list('id', flat=True))
+
+        storage = Recipe._meta.get_field('image').storage
+        if not storage.exists(IMAGE_NAME):
+            storage.save(IMAGE_NAME, ContentFile(placeholder_png()))
+
+        last_user = User.all_objects.order_by('-id').values_list(
+            'id', flat=True).first() or 0
+        password = make_password('fixture-password')
+        prefix = f'fixture{options["seed"]}_{last_user}_'
+        self.bulk_create(User, (
+            User(username=f'{prefix}{number}',
+                 email=f'{prefix}{number}@example.com',
+                 first_name=f'Имя{number}', last_name=f'Фамилия{number}',
+                 password=password)
+            for number in range(options['users'])
+        ), batch_size)
+        user_ids = list(User.objects.filter(
+            id__gt=last_user).order_by('id').values_list('id', flat=True))
+        rng.shuffle(user_ids)
+
+        last_recipe = Recipe.all_objects.order_by('-id').values_list(
+            'id', flat=True).first() or 0
+        author_weights = zipf_weights(len(user_ids), exponent)
+        self.bulk_create(Recipe, (
+            Recipe(author_id=author_id,
+                   name=f'{rng.choice(WORDS).capitalize()} №{number}',
+                   text=' '.join(rng.choices(WORDS, k=rng.randint(20, 80))),
+                   cooking_time=rng.randint(5, 180),
+                   image=IMAGE_NAME)
+            for number, author_id in enumerate(rng.choices(
+                user_ids, cum_weights=author_weights,
+                k=options['recipes']))
+        ), batch_size)
+        recipe_ids = list(Recipe.objects.filter(
+            id__gt=last_recipe).order_by('id').values_list('id', flat=True))
+
+        self.bulk_create(RecipesIngredients, (
+            RecipesIngredients(recipe_id=recipe_id, ingredient_id=ingredient,
+                               amount=rng.randint(1, 50))
+            for recipe_id in recipe_ids
+            for ingredient in rng.sample(
+                ingredient_ids, min(len(ingredient_ids),
+                                    max(1, int(rng.gauss(8, 3)))))
+        ), batch_size)
+        self.bulk_create(Recipe.tags.through, (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rng.sample(
+                tag_ids, rng.randint(1, min(len(tag_ids), 3)))
+        ), batch_size)
+
+        rng.shuffle(recipe_ids)
+        self.bulk_create(Favorite, (
+            Favorite(user_id=user_id, recipe_id=recipe_id)
+            for user_id, recipe_id in self.pairs(
+                rng, options['favorites'], user_ids, recipe_ids, exponent)
+        ), batch_size)
+        self.bulk_create(ShoppingCart, (
+            ShoppingCart(user_id=user_id, recipe_id=recipe_id)
+            for user_id, recipe_id in self.pairs(
+                rng, options['carts'], user_ids, recipe_ids, exponent)
+        ), batch_size)
+        self.bulk_create(Subscription, (
+            Subscription(user_id=user_id, author_id=author_id)
+            for user_id, author_id in self.pairs(
+                rng, options['subscriptions'], user_ids, user_ids,
+                exponent, distinct=True)
+        ), batch_size)
+        # bulk_create не отправляет сигналы, счётчики пересчитываются.
+        reconcile_counters(User, Recipe, Subscription)
+        self.stdout.write(self.style.SUCCESS('Данные успешно созданы!'))
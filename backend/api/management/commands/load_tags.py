@@ -3,11 +3,13 @@ from recipes.models import Tag
 
 
 class Command(BaseCommand):
+    requires_system_checks = []
 
     def handle(self, *args, **kwargs):
         data = [
             {'name': 'Завтрак', 'color': '#FF5733', 'slug': 'breakfast'},
             {'name': 'Обед', 'color': '#33FF57', 'slug': 'dinner'},
             {'name': 'Ужин', 'color': '#5733FF', 'slug': 'supper'}]
-        Tag.objects.bulk_create(Tag(**tag) for tag in data)
+        Tag.objects.bulk_create((Tag(**tag) for tag in data),
+                                ignore_conflicts=True)
         self.stdout.write(self.style.SUCCESS('Теги успешно загружены!'))
@@ -0,0 +1,242 @@
+import json
+import random
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from recipes.models import Ingredient, Recipe, Tag
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+ID_PATTERN = re.compile(r'/\d+/')
+
+
+def percentile(values, share):
+    """Процентиль по ближайшему рангу для отсортированного списка."""
+    if not values:
+        return None
+    rank = max(int(round(share * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class Client:
+    """HTTP-клиент одного виртуального пользователя на urllib."""
+
+    def __init__(self, base_url, token, timeout, stats):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self.stats = stats
+
+    def request(self, method, path, data=None):
+        """Выполняет запрос и записывает его длительность и статус."""
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(
+            self.base_url + path, data=body, headers=headers, method=method)
+        endpoint = f'{method} {ID_PATTERN.sub("/{id}/", path.split("?")[0])}'
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(
+                    request, timeout=self.timeout) as response:
+                payload = response.read()
+                code = response.status
+        except urllib.error.HTTPError as error:
+            payload = error.read()
+            code = error.code
+        except (urllib.error.URLError, OSError):
+            payload = b''
+            code = 0
+        self.stats[endpoint].append((time.perf_counter() - started, code))
+        if payload and code == 200:
+            try:
+                return json.loads(payload)
+            except ValueError:
+                return None
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест: воспроизводит сценарии пользователей '
+            'против запущенного сервера и сохраняет задержки, '
+            'пропускную способность и долю ошибок по эндпоинтам в JSON.')
+
+    JOURNEYS = {
+        'browse': 50,
+        'search': 25,
+        'cart': 15,
+        'follow': 10,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000',
+                            help='Адрес сервера.')
+        parser.add_argument('--concurrency', type=int, default=10,
+                            help='Количество одновременных пользователей.')
+        parser.add_argument('--duration', type=float, default=60,
+                            help='Длительность теста, секунд.')
+        parser.add_argument('--users', type=int, default=50,
+                            help='Количество пользователей с токенами.')
+        parser.add_argument('--anonymous-share', type=float, default=0.3,
+                            help='Доля анонимных сценариев просмотра.')
+        parser.add_argument('--timeout', type=float, default=30,
+                            help='Таймаут запроса, секунд.')
+        parser.add_argument('--seed', type=int, default=1,
+                            help='Начальное значение генератора.')
+        parser.add_argument('--output', default=None,
+                            help='Файл для результатов в формате JSON.')
+
+    def load_targets(self, users):
+        """Идентификаторы для сценариев и токены пользователей."""
+        self.recipe_ids = list(
+            Recipe.objects.order_by('-pub_date')
+            .values_list('id', flat=True)[:1000])
+        self.tag_slugs = list(Tag.objects.values_list('slug', flat=True))
+        self.author_ids = list(
+            Recipe.objects.order_by().values_list('author_id', flat=True)
+            .distinct()[:1000])
+        self.ingredient_names = list(
+            Ingredient.objects.order_by('?')
+            .values_list('name', flat=True)[:200])
+        if not (self.recipe_ids and self.tag_slugs
+                and self.ingredient_names):
+            raise CommandError('Нет рецептов, тегов или ингредиентов; '
+                               'заполните базу generate_fixture_data.')
+        self.tokens = [
+            Token.objects.get_or_create(user=user)[0].key
+            for user in User.objects.filter(
+                is_staff=False, is_active=True).order_by('id')[:users]
+        ]
+
+    def browse(self, client, rng):
+        """Лента с фильтром по тегам, пагинация и открытие рецептов."""
+        client.request('GET', '/api/tags/')
+        tags = rng.sample(self.tag_slugs, rng.randint(1, len(self.tag_slugs)))
+        query = urllib.parse.urlencode([('tags', slug) for slug in tags])
+        for page in range(1, rng.randint(1, 3) + 1):
+            data = client.request('GET', f'/api/recipes/?{query}&page={page}')
+            results = (data or {}).get('results') or []
+            for recipe in rng.sample(results, min(len(results), 2)):
+                client.request('GET', f'/api/recipes/{recipe["id"]}/')
+
+    def search(self, client, rng):
+        """Поиск ингредиента по мере набора названия."""
+        name = rng.choice(self.ingredient_names)
+        for length in range(1, min(len(name), 5) + 1):
+            prefix = urllib.parse.quote(name[:length])
+            client.request('GET', f'/api/ingredients/?name={prefix}')
+
+    def cart(self, client, rng):
+        """Добавление рецептов в корзину и скачивание списка покупок."""
+        recipes = rng.sample(self.recipe_ids, min(len(self.recipe_ids), 3))
+        for recipe_id in recipes:
+            client.request('POST', f'/api/recipes/{recipe_id}/shopping_cart/')
+        client.request('GET', '/api/recipes/download_shopping_cart/')
+        for recipe_id in recipes:
+            client.request('DELETE',
+                           f'/api/recipes/{recipe_id}/shopping_cart/')
+
+    def follow(self, client, rng):
+        """Подписка на автора и просмотр подписок."""
+        author_id = rng.choice(self.author_ids)
+        client.request('GET', f'/api/users/{author_id}/')
+        client.request('POST', f'/api/users/{author_id}/subscribe/')
+        client.request('GET', '/api/users/subscriptions/')
+        client.request('DELETE', f'/api/users/{author_id}/subscribe/')
+
+    def worker(self, number, options, deadline):
+        rng = random.Random(options['seed'] * 1000 + number)
+        stats = defaultdict(list)
+        names = list(self.JOURNEYS)
+        weights = list(self.JOURNEYS.values())
+        journeys = 0
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            token = None
+            if self.tokens and (name != 'browse' or rng.random()
+                                >= options['anonymous_share']):
+                token = rng.choice(self.tokens)
+            elif name != 'browse':
+                name = 'browse'
+            client = Client(options['base_url'], token,
+                            options['timeout'], stats)
+            getattr(self, name)(client, rng)
+            journeys += 1
+        return stats, journeys
+
+    def summarize(self, samples, elapsed):
+        latencies = sorted(duration * 1000 for duration, _ in samples)
+        errors = sum(1 for _, code in samples if code == 0 or code >= 500)
+        client_errors = sum(1 for _, code in samples if 400 <= code < 500)
+        return {
+            'requests': len(samples),
+            'throughput': round(len(samples) / elapsed, 2),
+            'error_rate': round(errors / len(samples), 4),
+            'client_error_rate': round(client_errors / len(samples), 4),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'max_ms': round(latencies[-1], 2),
+        }
+
+    def handle(self, *args, **options):
+        self.load_targets(options['users'])
+        started_at = timezone.now()
+        started = time.monotonic()
+        deadline = started + options['duration']
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            futures = [
+                executor.submit(self.worker, number, options, deadline)
+                for number in range(options['concurrency'])
+            ]
+            results = [future.result() for future in futures]
+        elapsed = time.monotonic() - started
+
+        merged = defaultdict(list)
+        for stats, _ in results:
+            for endpoint, samples in stats.items():
+                merged[endpoint].extend(samples)
+        all_samples = [
+            sample for samples in merged.values() for sample in samples]
+        if not all_samples:
+            raise CommandError('Не выполнено ни одного запроса.')
+        report = {
+            'started_at': started_at.isoformat(),
+            'base_url': options['base_url'],
+            'concurrency': options['concurrency'],
+            'duration': round(elapsed, 2),
+            'seed': options['seed'],
+            'journeys': sum(journeys for _, journeys in results),
+            'total': self.summarize(all_samples, elapsed),
+            'endpoints': {
+                endpoint: self.summarize(samples, elapsed)
+                for endpoint, samples in sorted(merged.items())
+            },
+        }
+
+        for endpoint, summary in report['endpoints'].items():
+            self.stdout.write(
+                f'{endpoint}: {summary["requests"]} запросов, '
+                f'{summary["throughput"]}/с, p50 {summary["p50_ms"]} мс, '
+                f'p95 {summary["p95_ms"]} мс, p99 {summary["p99_ms"]} мс, '
+                f'ошибки {summary["error_rate"]:.2%}'
+            )
+        total = report['total']
+        self.stdout.write(
+            f'Итого: {total["requests"]} запросов, '
+            f'{total["throughput"]}/с, ошибки {total["error_rate"]:.2%}')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Результаты записаны в {options["output"]}')
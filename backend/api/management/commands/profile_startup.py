@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+TARGETS = {
+    'wsgi': 'import foodgram.wsgi',
+    'urls': ('import foodgram.wsgi; from django.urls import get_resolver; '
+             'get_resolver().url_patterns'),
+    'setup': 'import django; django.setup()',
+}
+
+
+def group_name(module):
+    """Группа модуля: приложение django.contrib или пакет верхнего уровня."""
+    parts = module.split('.')
+    if parts[:2] == ['django', 'contrib'] and len(parts) > 2:
+        return '.'.join(parts[:3])
+    return parts[0]
+
+
+class Command(BaseCommand):
+    help = ('Запускает загрузку приложения с -X importtime в отдельном '
+            'процессе и выводит время импорта по приложениям и пакетам.')
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=TARGETS, default='wsgi',
+                            help='Что загружать: WSGI-приложение, его '
+                                 'URL-конфигурацию или только django.setup.')
+        parser.add_argument('--limit', type=int, default=25,
+                            help='Количество групп в отчёте.')
+        parser.add_argument('--output',
+                            help='Файл для сохранения отчёта в JSON.')
+
+    def handle(self, *args, **options):
+        env = os.environ.copy()
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             TARGETS[options['target']]],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if process.returncode:
+            raise CommandError(process.stderr[-2000:])
+
+        groups = defaultdict(lambda: {'self_us': 0, 'modules': 0})
+        for line in process.stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            self_us, _, module = line[len('import time:'):].split('|')
+            if not self_us.strip().isdigit():
+                continue
+            group = groups[group_name(module.strip())]
+            group['self_us'] += int(self_us)
+            group['modules'] += 1
+
+        total = sum(group['self_us'] for group in groups.values())
+        ranking = sorted(groups.items(), key=lambda item: -item[1]['self_us'])
+        for name, group in ranking[:options['limit']]:
+            self.stdout.write(
+                f'{group["self_us"] / 1000:9.1f} мс '
+                f'{group["modules"]:5d} модулей  {name}'
+            )
+        self.stdout.write(f'Всего: {total / 1000:.1f} мс, '
+                          f'{sum(g["modules"] for g in groups.values())} '
+                          f'модулей')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({'target': options['target'], 'total_us': total,
+                           'groups': dict(ranking)},
+                          file, ensure_ascii=False, indent=2)
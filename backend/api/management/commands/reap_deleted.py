@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes.deletion import reap
+
+
+class Command(BaseCommand):
+    help = ('Окончательно удаляет помеченные удалёнными рецепты '
+            'и пользователей вместе с зависимыми строками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.REAPER_BATCH_SIZE,
+            help='Строк в одной транзакции удаления.')
+
+    def handle(self, *args, **options):
+        deleted = reap(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено рецептов: {deleted["recipes"]}, '
+            f'пользователей: {deleted["users"]}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from recipes.models import Recipe
+from users.counters import reconcile_counters
+from users.models import Subscription, User
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики рецептов, подписчиков и подписок '
+            'пользователей и исправляет расхождения.')
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counters(User, Recipe, Subscription)
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено пользователей: {fixed}'))
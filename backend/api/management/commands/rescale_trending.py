@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from recipes import trending
+
+
+class Command(BaseCommand):
+    help = ('Переносит начало отсчёта рейтинга популярности рецептов '
+            'на текущий момент. Воркер задач делает это раз в сутки '
+            'сам; команда нужна для ручного запуска.')
+
+    def handle(self, *args, **options):
+        factor = trending.rescale()
+        self.stdout.write(self.style.SUCCESS(
+            f'Оценки популярности умножены на {factor:.6g}'))
@@ -0,0 +1,72 @@
+"""
+Счётчики и показатели в памяти процесса с выводом
+в текстовом формате Prometheus.
+"""
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """Реестр метрик процесса: счётчики, показатели и суммы наблюдений."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.gauges = {}
+        self.summaries = defaultdict(lambda: [0, 0.0])
+        self.collectors = []
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """Увеличивает счётчик."""
+        with self.lock:
+            self.counters[self.key(name, labels)] += value
+
+    def set(self, name, value, **labels):
+        """Устанавливает значение показателя."""
+        with self.lock:
+            self.gauges[self.key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        """Добавляет наблюдение (например, длительность запроса)."""
+        with self.lock:
+            summary = self.summaries[self.key(name, labels)]
+            summary[0] += 1
+            summary[1] += value
+
+    def register_collector(self, collector):
+        """
+        Регистрирует функцию, которая обновляет показатели
+        непосредственно перед выводом метрик.
+        """
+        self.collectors.append(collector)
+
+    @staticmethod
+    def format(name, labels, value):
+        if labels:
+            label_text = ','.join(
+                f'{label}="{label_value}"' for label, label_value in labels)
+            name = f'{name}{{{label_text}}}'
+        return f'{name} {value}'
+
+    def render(self):
+        """Возвращает метрики в текстовом формате Prometheus."""
+        for collector in self.collectors:
+            collector(self)
+        lines = []
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(self.format(name, labels, value))
+            for (name, labels), value in sorted(self.gauges.items()):
+                lines.append(self.format(name, labels, value))
+            for (name, labels), (count, total) in sorted(
+                    self.summaries.items()):
+                lines.append(self.format(f'{name}_count', labels, count))
+                lines.append(self.format(f'{name}_sum', labels, total))
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -0,0 +1,153 @@
+"""
+Похожие рецепты по ингредиентам: MinHash-сигнатуры и LSH-индекс.
+Сигнатура из NUM_PERM минимумов хешей оценивает коэффициент Жаккара
+наборов ингредиентов. Сигнатура делится на BANDS полос по ROWS
+значений; рецепты с совпавшей полосой становятся кандидатами,
+поэтому поиск не сравнивает рецепт со всеми остальными.
+При 16 полосах по 4 значения кандидатами с вероятностью около 1/2
+становятся пары со сходством 0.5 и почти наверняка - со сходством 0.8.
+"""
+import hashlib
+import itertools
+import random
+from array import array
+
+from django.db import transaction
+from django.db.models import Q
+from recipes.models import RecipeBucket, RecipeSignature, RecipesIngredients
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Предел кандидатов из одной корзины. Корзина переполняется, когда
+# у многих рецептов совпадает полоса, например у рецептов с
+# одинаковым набором из пары популярных ингредиентов; без предела
+# поиск сравнивал бы сигнатуры всех таких рецептов.
+MAX_BUCKET_CANDIDATES = 200
+PRIME = (1 << 61) - 1
+MASK = (1 << 32) - 1
+
+_random = random.Random(20240601)
+PERMUTATIONS = tuple(
+    (_random.randrange(1, PRIME), _random.randrange(0, PRIME))
+    for _ in range(NUM_PERM)
+)
+
+
+def signature(ingredient_ids):
+    """MinHash-сигнатура набора идентификаторов ингредиентов."""
+    ids = set(ingredient_ids)
+    if not ids:
+        return array('I', [MASK] * NUM_PERM)
+    return array('I', (
+        min((a * value + b) % PRIME for value in ids) & MASK
+        for a, b in PERMUTATIONS
+    ))
+
+
+def pack(values):
+    return values.tobytes()
+
+
+def unpack(data):
+    values = array('I')
+    values.frombytes(bytes(data))
+    return values
+
+
+def band_buckets(values):
+    """Пары (полоса, корзина) для сигнатуры."""
+    buckets = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(
+            values[band * ROWS:(band + 1) * ROWS].tobytes(),
+            digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+
+def estimate(left, right):
+    """Оценка коэффициента Жаккара по двум сигнатурам."""
+    return sum(x == y for x, y in zip(left, right)) / NUM_PERM
+
+
+def index_rows(recipe_id, values):
+    """Строки сигнатуры и корзин рецепта для сохранения."""
+    return (
+        RecipeSignature(recipe_id=recipe_id, signature=pack(values)),
+        [RecipeBucket(recipe_id=recipe_id, band=band, bucket=bucket)
+         for band, bucket in band_buckets(values)],
+    )
+
+
+@transaction.atomic
+def update_signature(recipe_id, ingredient_ids):
+    """Пересчитывает сигнатуру и корзины рецепта."""
+    values = signature(ingredient_ids)
+    row, buckets = index_rows(recipe_id, values)
+    RecipeSignature.objects.update_or_create(
+        recipe_id=recipe_id, defaults={'signature': row.signature})
+    RecipeBucket.objects.filter(recipe_id=recipe_id).delete()
+    RecipeBucket.objects.bulk_create(buckets)
+    return values
+
+
+def similar_by_signature(values, exclude=None, threshold=0.3, limit=10):
+    """
+    Рецепты, сходство которых с сигнатурой не меньше threshold,
+    в порядке убывания сходства: [(рецепт, сходство), ...].
+    Из каждой корзины берётся не больше MAX_BUCKET_CANDIDATES
+    рецептов, так что сигнатур сравнивается не больше
+    BANDS * MAX_BUCKET_CANDIDATES.
+    """
+    condition = Q()
+    for band, bucket in band_buckets(values):
+        members = RecipeBucket.objects.filter(band=band, bucket=bucket)
+        if exclude is not None:
+            members = members.exclude(recipe_id=exclude)
+        condition |= Q(recipe_id__in=members.values('recipe_id')[
+            :MAX_BUCKET_CANDIDATES])
+    scored = []
+    for recipe_id, data in RecipeSignature.objects.filter(
+            condition).values_list('recipe_id', 'signature'):
+        score = estimate(values, unpack(data))
+        if score >= threshold:
+            scored.append((recipe_id, score))
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:limit]
+
+
+def similar_recipes(recipe_id, threshold=0.3, limit=10):
+    """Рецепты, похожие на данный по ингредиентам."""
+    data = RecipeSignature.objects.filter(
+        recipe_id=recipe_id).values_list('signature', flat=True).first()
+    if data is None:
+        return []
+    return similar_by_signature(unpack(data), recipe_id, threshold, limit)
+
+
+def rebuild_index(batch_size=5000):
+    """
+    Пересчитывает сигнатуры всех рецептов, например после
+    массовой загрузки данных. Возвращает количество рецептов.
+    """
+    RecipeBucket.objects.all().delete()
+    RecipeSignature.objects.all().delete()
+    rows = RecipesIngredients.objects.order_by('recipe_id').values_list(
+        'recipe_id', 'ingredient_id').iterator(chunk_size=batch_size)
+    recipes = (
+        index_rows(recipe_id, signature(
+            ingredient for _, ingredient in group))
+        for recipe_id, group in itertools.groupby(
+            rows, key=lambda row: row[0])
+    )
+    total = 0
+    while True:
+        batch = list(itertools.islice(recipes, batch_size))
+        if not batch:
+            return total
+        with transaction.atomic():
+            RecipeSignature.objects.bulk_create(row for row, _ in batch)
+            RecipeBucket.objects.bulk_create(
+                bucket for _, buckets in batch for bucket in buckets)
+        total += len(batch)
@@ -1,3 +1,11 @@
+import hashlib
+from contextlib import ExitStack
+
+from django.db import router
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from foodgram.db import statement_timeout
 from rest_framework import mixins, viewsets
 
 
@@ -8,3 +16,144 @@ class ListRetrieveViewSet(
     viewsets.GenericViewSet
 ):
     pass
+
+
+class StatementTimeoutMixin:
+    """
+    Таймаут SQL-запросов для отдельных действий вьюсета, мс.
+    statement_timeouts сопоставляет действию таймаут. Действие
+    выполняется в транзакции на базе, выбранной роутером для чтения,
+    и таймаут действует только до её завершения.
+    """
+
+    statement_timeouts = {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        milliseconds = self.statement_timeouts.get(self.action)
+        if milliseconds is not None:
+            self.timeout_scope = ExitStack()
+            self.timeout_scope.enter_context(statement_timeout(
+                router.db_for_read(self.queryset.model), milliseconds))
+
+    def close_timeout_scope(self, exc=None):
+        """Завершает транзакцию действия; при ошибке - откатывает."""
+        scope = getattr(self, 'timeout_scope', None)
+        if scope is None:
+            return
+        self.timeout_scope = None
+        if exc is None:
+            scope.close()
+        else:
+            scope.__exit__(type(exc), exc, exc.__traceback__)
+
+    def handle_exception(self, exc):
+        self.close_timeout_scope(exc)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        self.close_timeout_scope()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SparseFieldsetMixin:
+    """
+    Разреженный набор полей для списков и детальных ответов:
+    ?fields=id,name или ?view=card с заранее заданным набором полей.
+    Вьюсет может использовать get_requested_fields() для сокращения
+    запроса к базе данных.
+    """
+
+    sparse_views = {}
+    sparse_actions = ('list', 'retrieve')
+
+    def get_requested_fields(self):
+        """Возвращает множество запрошенных полей или None."""
+        if self.action not in self.sparse_actions:
+            return None
+        params = self.request.query_params
+        if params.get('fields'):
+            fields = {
+                name.strip() for name in params['fields'].split(',')
+                if name.strip()
+            }
+        elif params.get('view') in self.sparse_views:
+            fields = set(self.sparse_views[params['view']])
+        else:
+            return None
+        return frozenset(fields | {'id'})
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Поддержка условных GET-запросов (ETag/Last-Modified).
+    Вьюсет определяет get_version_stamp(), который возвращает дешёвый
+    отпечаток данных (максимальные даты, количество строк) без
+    сериализации тела ответа. Совпадение с If-None-Match даёт ответ 304.
+    """
+
+    conditional_actions = ('list', 'retrieve')
+
+    def get_version_stamp(self):
+        """Возвращает отпечаток данных для текущего действия."""
+        raise NotImplementedError
+
+    def get_last_modified(self):
+        """
+        Возвращает дату последнего изменения данных или None.
+        Отпечаток текущего запроса доступен в self.version_stamp.
+        """
+        return None
+
+    def get_etag(self, request):
+        """Строит ETag из пути запроса, пользователя и отпечатка данных."""
+        stamp = (
+            self.action,
+            request.get_full_path(),
+            request.user.pk,
+            self.version_stamp,
+        )
+        return hashlib.md5(repr(stamp).encode()).hexdigest()
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """
+        Возвращает 304, если данные не изменились,
+        иначе вызывает обработчик и добавляет валидаторы в ответ.
+        """
+        if request.method not in ('GET', 'HEAD'):
+            return handler(request, *args, **kwargs)
+        self.version_stamp = self.get_version_stamp()
+        etag = quote_etag(self.get_etag(request))
+        last_modified = self.get_last_modified()
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,163 @@
+"""
+Рекомендации "похожие рецепты" по взаимодействиям пользователей.
+Избранное и корзина загружаются в разреженную матрицу
+пользователи x рецепты, косинусное сходство рецептов считается
+пачками строк, и для каждого рецепта сохраняются top-K соседей
+в таблицу SimilarRecipe. Кроме самой матрицы, память расчёта
+ограничена произведением одного блока: не больше max_nnz элементов.
+NumPy и SciPy нужны только для расчёта и импортируются при запуске.
+"""
+import itertools
+
+from django.db import transaction
+from recipes.models import Favorite, Recipe, ShoppingCart, SimilarRecipe
+
+# Вес взаимодействия в матрице; повторные взаимодействия складываются.
+INTERACTIONS = ((Favorite, 1.0), (ShoppingCart, 0.5))
+
+
+def load_interactions(np):
+    """Загружает пары пользователь - рецепт и их веса в массивы."""
+    users, recipes, weights = [], [], []
+    for model, weight in INTERACTIONS:
+        pairs = model.objects.order_by().values_list('user_id', 'recipe_id')
+        array = np.fromiter(
+            itertools.chain.from_iterable(pairs.iterator(chunk_size=10000)),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        users.append(array[:, 0])
+        recipes.append(array[:, 1])
+        weights.append(np.full(len(array), weight, dtype=np.float32))
+    return (np.concatenate(users), np.concatenate(recipes),
+            np.concatenate(weights))
+
+
+def item_matrix(np, sparse, users, recipes, weights):
+    """
+    Строит матрицу пользователи x рецепты с нормированными
+    столбцами, так что произведение столбцов - косинусное сходство.
+    """
+    user_ids, user_index = np.unique(users, return_inverse=True)
+    recipe_ids, recipe_index = np.unique(recipes, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (weights, (user_index, recipe_index)),
+        shape=(len(user_ids), len(recipe_ids)), dtype=np.float32)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    counts = np.diff(matrix.tocsc().indptr)
+    return recipe_ids, (matrix @ sparse.diags(1 / norms)).tocsr(), counts
+
+
+def product_sizes(np, items, matrix):
+    """
+    Верхняя оценка числа ненулевых элементов строки произведения
+    items @ matrix для каждого рецепта: сумма количеств
+    взаимодействий его пользователей.
+    """
+    user_degrees = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(items.shape[0]), np.diff(items.indptr))
+    sizes = np.bincount(rows, weights=user_degrees[items.indices],
+                        minlength=items.shape[0]).astype(np.int64)
+    return np.minimum(sizes, matrix.shape[1])
+
+
+def blocks(positions, sizes, batch_size, max_nnz):
+    """
+    Делит positions на блоки не длиннее batch_size, в которых сумма
+    sizes не превышает max_nnz. Рецепт с оценкой больше max_nnz
+    образует отдельный блок.
+    """
+    start, total = 0, 0
+    for index, position in enumerate(positions):
+        if index > start and (index - start >= batch_size
+                              or total + sizes[position] > max_nnz):
+            yield positions[start:index]
+            start, total = index, 0
+        total += sizes[position]
+    if start < len(positions):
+        yield positions[start:]
+
+
+def top_similar(np, recipe_ids, matrix, counts, positions, top_k,
+                batch_size, min_interactions, max_nnz):
+    """
+    Возвращает (рецепт, [(похожий рецепт, сходство), ...]) для рецептов
+    с номерами positions. Сходство считается блоками рецептов, у
+    которых оценка ненулевых элементов произведения не больше
+    max_nnz, поэтому результат блока занимает не больше max_nnz
+    элементов (около 8 байт на элемент), кроме блока из одного
+    рецепта: его строка не длиннее числа рецептов. Из строки
+    сразу отбираются top_k соседей.
+    """
+    items = matrix.T.tocsr()
+    eligible = counts >= min_interactions
+    sizes = product_sizes(np, items, matrix)
+    for batch in blocks(positions, sizes, batch_size, max_nnz):
+        scores = (items[batch] @ matrix).tocsr()
+        for row, position in enumerate(batch):
+            begin, end = scores.indptr[row], scores.indptr[row + 1]
+            columns = scores.indices[begin:end]
+            values = scores.data[begin:end]
+            keep = (columns != position) & eligible[columns]
+            columns, values = columns[keep], values[keep]
+            if len(values) > top_k:
+                best = np.argpartition(-values, top_k)[:top_k]
+                columns, values = columns[best], values[best]
+            order = np.argsort(-values, kind='stable')
+            yield int(recipe_ids[position]), [
+                (int(recipe_ids[column]), float(value))
+                for column, value in zip(columns[order], values[order])
+            ]
+
+
+def store(neighbors):
+    """Заменяет соседей пачки рецептов одним набором запросов."""
+    recipe_ids = {recipe_id for recipe_id, _ in neighbors}
+    recipe_ids |= {similar for _, rows in neighbors for similar, _ in rows}
+    existing = set(Recipe.objects.filter(
+        id__in=recipe_ids).values_list('id', flat=True))
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(
+            recipe_id__in=[recipe_id for recipe_id, _ in neighbors]).delete()
+        SimilarRecipe.objects.bulk_create(
+            SimilarRecipe(recipe_id=recipe_id, similar_id=similar,
+                          score=score, rank=rank)
+            for recipe_id, rows in neighbors if recipe_id in existing
+            for rank, (similar, score) in enumerate(
+                (row for row in rows if row[0] in existing), 1)
+        )
+
+
+def build_recommendations(top_k=20, batch_size=1000, min_interactions=2,
+                          only_new=False, max_nnz=5000000):
+    """
+    Пересчитывает похожие рецепты и возвращает количество
+    обработанных рецептов. only_new считает только рецепты,
+    для которых соседи ещё не сохранены. max_nnz ограничивает
+    размер произведения в одном блоке расчёта.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    users, recipes, weights = load_interactions(np)
+    if not len(users):
+        return 0
+    recipe_ids, matrix, counts = item_matrix(
+        np, sparse, users, recipes, weights)
+    positions = np.flatnonzero(counts >= min_interactions)
+    if only_new:
+        done = np.fromiter(
+            SimilarRecipe.objects.order_by().values_list(
+                'recipe_id', flat=True).distinct().iterator(),
+            dtype=np.int64)
+        positions = positions[~np.isin(recipe_ids[positions], done)]
+    processed = 0
+    neighbors = top_similar(np, recipe_ids, matrix, counts, positions,
+                            top_k, batch_size, min_interactions, max_nnz)
+    while True:
+        batch = list(itertools.islice(neighbors, batch_size))
+        if not batch:
+            break
+        store(batch)
+        processed += len(batch)
+    return processed
@@ -2,12 +2,15 @@ import base64
 import logging
 
 from django.core.files.base import ContentFile
-from recipes.models import (Favorite, Ingredient, Recipe, RecipesIngredients,
-                            ShoppingCart, Tag)
+from django.urls import reverse
+from recipes.models import (ExportJob, Favorite, Ingredient, Recipe,
+                            RecipesIngredients, ShoppingCart, Tag)
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 from users.models import Subscription, User
 
+from .minhash import update_signature
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,13 +30,31 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Позволяет передать в сериализатор аргумент fields
+    и оставить в ответе только перечисленные поля.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для пользовательской модели."""
 
     class Meta:
         model = User
         fields = ('id', 'email', 'username', 'first_name',
-                  'last_name', 'password', 'is_subscribed')
+                  'last_name', 'password', 'is_subscribed',
+                  'recipes_count', 'followers_count', 'following_count')
+        extra_kwargs = {'password': {'write_only': True}}
+        read_only_fields = ('recipes_count', 'followers_count',
+                            'following_count')
 
     def create(self, validated_data):
         """
@@ -62,7 +83,7 @@ class UserSerializer(serializers.ModelSerializer):
         """Функция для измения представления при GET и POST запросах."""
         instance = super().to_representation(instance)
         if self.context.get('request').method == 'POST':
-            instance.pop('is_subscribed')
+            instance.pop('is_subscribed', None)
         return instance
 
 
@@ -202,6 +223,8 @@ class RecipeSaveSerializer(serializers.ModelSerializer):
                 )
             )
         RecipesIngredients.objects.bulk_create(ingredients_to_create)
+        update_signature(recipe.id, [
+            ingredient.ingredient_id for ingredient in ingredients_to_create])
         return recipe
 
     def update(self, instance, validated_data):
@@ -213,6 +236,8 @@ class RecipeSaveSerializer(serializers.ModelSerializer):
         RecipesIngredients.objects.filter(recipe=instance).delete()
         instance.tags.set(tags)
         self.get_ingredients(instance, ingredients)
+        update_signature(instance.id, [
+            ingredient['ingredient'].id for ingredient in ingredients])
         return super().update(instance, validated_data)
 
     def get_ingredients(self, recipe, ingredients_data):
@@ -253,11 +278,12 @@ class RecipeSaveSerializer(serializers.ModelSerializer):
                 fields=['author', 'name'],
                 message='Рецепт с таким названием уже добавлен')
         ]
-        fields = '__all__'
+        fields = ('id', 'author', 'ingredients', 'image', 'tags', 'name',
+                  'text', 'cooking_time', 'pub_date', 'updated_at')
         read_only_fields = ('author',)
 
 
-class RecipeGetSerializer(serializers.ModelSerializer):
+class RecipeGetSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Сериализатор для получения информации о рецепте.
     """
@@ -274,6 +300,8 @@ class RecipeGetSerializer(serializers.ModelSerializer):
         """
         Проверяет, добавлен ли рецепт в избранное у текущего пользователя.
         """
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         return request.user.is_authenticated and Favorite.objects.filter(
             user=request.user, recipe=obj).exists()
@@ -282,13 +310,17 @@ class RecipeGetSerializer(serializers.ModelSerializer):
         """
         Проверяет, добавлен ли рецепт в список покупок у текущего пользователя.
         """
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         return request.user.is_authenticated and ShoppingCart.objects.filter(
             user=request.user, recipe=obj).exists()
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
+                  'is_in_shopping_cart', 'image', 'name', 'text',
+                  'cooking_time', 'pub_date', 'updated_at')
         read_only_fields = ('id', 'author',)
 
 
@@ -317,12 +349,6 @@ class UserSubscribeControlSerializer(UserSerializer):
         return RecipeGetSerializer(recipes, many=True,
                                    context={'request': request}).data
 
-    def get_recipes_count(self, obj):
-        """
-        Возвращает общее количество рецептов пользователя.
-        """
-        return obj.recipes.count()
-
 
 class SubscribeSerializer(serializers.ModelSerializer):
     """
@@ -410,3 +436,26 @@ class RecipeFollowSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для заданий на выгрузку. file - ссылка
+    на скачивание готового файла через API.
+    """
+
+    file = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = ('id', 'kind', 'format', 'status', 'file', 'error',
+                  'created', 'finished')
+        read_only_fields = ('status', 'file', 'error', 'created',
+                            'finished')
+
+    def get_file(self, obj):
+        if not obj.file:
+            return None
+        url = reverse('api:exports-download', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
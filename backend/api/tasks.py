@@ -0,0 +1,88 @@
+import csv
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from recipes import changelog, deletion, trending
+from recipes.models import ExportJob, Ingredient
+from tasks.registry import task
+
+from .exports import write_export
+from .recommendations import build_recommendations
+
+
+@task()
+@transaction.atomic
+def import_ingredients(path):
+    """
+    Импортирует ингредиенты из CSV-файла с заголовком,
+    пропуская уже существующие пары название - единица измерения.
+    Возвращает количество созданных и пропущенных строк файла.
+    """
+    existing = set(
+        Ingredient.objects.values_list('name', 'measurement_unit'))
+    ingredients_to_create = []
+    total = 0
+    with open(path, 'r', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader)
+        for row in reader:
+            if len(row) != 2:
+                continue
+            total += 1
+            if tuple(row) not in existing:
+                existing.add(tuple(row))
+                name, measurement_unit = row
+                ingredients_to_create.append(Ingredient(
+                    name=name,
+                    measurement_unit=measurement_unit,
+                ))
+    Ingredient.objects.bulk_create(ingredients_to_create, batch_size=1000)
+    return {
+        'created': len(ingredients_to_create),
+        'existing': total - len(ingredients_to_create),
+    }
+
+
+@task(max_retries=0)
+def generate_export(job_id):
+    """Формирует файл выгрузки и обновляет статус задания."""
+    job = ExportJob.objects.select_related('user').get(pk=job_id)
+    job.status = ExportJob.RUNNING
+    job.save(update_fields=('status',))
+    try:
+        write_export(job)
+    except Exception as error:
+        job.status = ExportJob.FAILED
+        job.error = str(error)
+        raise
+    else:
+        job.status = ExportJob.SUCCESS
+    finally:
+        job.finished = timezone.now()
+        job.save(update_fields=('status', 'file', 'error', 'finished'))
+    return job.file.name
+
+
+@task(max_retries=0)
+def rebuild_recommendations(only_new=False):
+    """Пересчитывает похожие рецепты в фоновом воркере."""
+    return build_recommendations(only_new=only_new)
+
+
+@task()
+def rescale_trending():
+    """Переносит начало отсчёта рейтинга популярности."""
+    return trending.rescale()
+
+
+@task()
+def reap_deleted():
+    """Окончательно удаляет помеченные рецепты и пользователей."""
+    return deletion.reap(settings.REAPER_BATCH_SIZE)
+
+
+@task()
+def compact_changes():
+    """Сжимает журнал изменений до последней записи по объекту."""
+    return changelog.compact(settings.CHANGES_COMPACT_BATCH_SIZE)
@@ -0,0 +1,76 @@
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+from .metrics import metrics
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket.
+    Частота задаётся в DEFAULT_THROTTLE_RATES в формате DRF:
+    '10/min' - корзина на 10 запросов, пополняемая на 10 в минуту,
+    что допускает короткие всплески без превышения средней частоты.
+    Состояние корзин хранится в кеше Django, общем для процессов,
+    если настроен общий бэкенд кеша.
+    """
+
+    scope = None
+    cache = cache
+
+    def __init__(self):
+        self.capacity, period = SimpleRateThrottle.parse_rate(
+            self, api_settings.DEFAULT_THROTTLE_RATES[self.scope])
+        self.refill_rate = self.capacity / period
+        self.deficit = 0
+
+    def get_ident_key(self, request, view):
+        """Ключ корзины: пользователь или IP-адрес."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        key = f'throttle:{self.scope}:{self.get_ident_key(request, view)}'
+        now = time.time()
+        tokens, updated = self.cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity,
+                     tokens + (now - updated) * self.refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.deficit = 1 - tokens
+        self.cache.set(key, (tokens, now),
+                       timeout=int(self.capacity / self.refill_rate) + 1)
+        metrics.inc('throttle_requests_total', scope=self.scope,
+                    result='allowed' if allowed else 'denied')
+        return allowed
+
+    def wait(self):
+        return max(self.deficit, 0) / self.refill_rate
+
+
+class UserWriteThrottle(TokenBucketThrottle):
+    """Запись в избранное, корзину и подписки: корзина на пользователя."""
+
+    scope = 'write_user'
+
+    def get_ident_key(self, request, view):
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+
+class IPWriteThrottle(TokenBucketThrottle):
+    """Запись с одного IP-адреса, независимо от пользователя."""
+
+    scope = 'write_ip'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class AutocompleteThrottle(IPWriteThrottle):
+    """Поиск ингредиентов при вводе: корзина на IP-адрес."""
+
+    scope = 'autocomplete'
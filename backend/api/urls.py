@@ -1,8 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (FavoriteViewSet, IngredientsViewset, RecipesViewset,
-                    TagViewset, UserViewset)
+from .views import (BatchView, EventTicketView, ExportJobViewSet,
+                    FavoriteViewSet, IngredientsViewset, MetricsView,
+                    RecipesViewset, TagViewset, UserViewset)
 
 app_name = 'api'
 
@@ -12,11 +13,15 @@ router.register('recipes', RecipesViewset, basename='recipes')
 router.register('ingredients', IngredientsViewset, basename='ingredients')
 router.register('tags', TagViewset, basename='tags')
 router.register('users', UserViewset, basename='users')
+router.register('exports', ExportJobViewSet, basename='exports')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('events/ticket/', EventTicketView.as_view(), name='events_ticket'),
     path('recipes/<int:pk>/shopping_cart/',
          RecipesViewset.as_view({
              'post': 'shopping_cart',
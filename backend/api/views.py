@@ -1,30 +1,118 @@
 import logging
 
-from django.db.models import F, Q, Sum
-from django.shortcuts import HttpResponse, get_object_or_404
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from recipes.models import (Favorite, Ingredient, Recipe, RecipesIngredients,
-                            ShoppingCart, Tag)
+from foodgram.db import iterate_with_statement_timeout
+from foodgram.sse import issue_ticket
+from recipes import deletion
+from recipes.models import (Change, ExportJob, Favorite, Ingredient, Recipe,
+                            RecipesIngredients, ShoppingCart, SimilarRecipe,
+                            Tag)
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import MethodNotAllowed
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from users.models import Subscription, User
 
+from . import fastpath, minhash
+from .batch import run_batch, validate, viewer_state
+from .exports import shopping_list_lines
 from .filters import IngredientFilter, RecipeFilter
+from .metrics import metrics
+from .mixins import (ConditionalGetMixin, SparseFieldsetMixin,
+                     StatementTimeoutMixin)
 from .permissions import IsAdminUserOrReadOnly, IsOwnerAdmin
-from .serializers import (FavoriteSerializer, IngredientSerializer,
-                          RecipeGetSerializer, RecipeSaveSerializer,
-                          ShoppingCartSerializer, SubscribeSerializer,
-                          TagSerializer, UserSerializer)
+from .renderers import PlainTextRenderer
+from .serializers import (ExportJobSerializer, FavoriteSerializer,
+                          IngredientSerializer, RecipeGetSerializer,
+                          RecipeSaveSerializer, ShoppingCartSerializer,
+                          SubscribeSerializer, TagSerializer, UserSerializer)
+from .tasks import generate_export, reap_deleted
+from .throttling import (AutocompleteThrottle, IPWriteThrottle,
+                         UserWriteThrottle)
 
 logger = logging.getLogger(__name__)
 
+WRITE_THROTTLES = (UserWriteThrottle, IPWriteThrottle)
 
-class IngredientsViewset(mixins.ListModelMixin,
+
+def rows_stamp(queryset):
+    """Отпечаток набора строк: количество и максимальный id."""
+    return tuple(queryset.order_by().aggregate(
+        count=Count('id'), last=Max('id')).values())
+
+
+def create_once(model, message, **fields):
+    """
+    Создаёт связь пользователя с объектом. Повторный запрос, который
+    прошёл проверку существования одновременно с первым, упирается
+    в ограничение уникальности; возвращает (объект, ответ с ошибкой).
+    """
+    try:
+        with transaction.atomic():
+            return model.objects.create(**fields), None
+    except IntegrityError:
+        metrics.inc('duplicate_writes_total', model=model._meta.model_name)
+        return None, Response({'detail': message},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+
+def version_stamp(queryset):
+    """
+    Отпечаток версионируемых строк: количество, последнее изменение
+    и номер и дата последней записи журнала изменений модели
+    (учитывает удаления). Последняя запись читается по индексу
+    (model, id), без агрегата по журналу.
+    """
+    stamp = queryset.order_by().aggregate(
+        count=Count('id', distinct=True), updated=Max('updated_at'))
+    latest = Change.objects.filter(
+        model=queryset.model._meta.label_lower
+    ).order_by('-id').values('id', 'created').first() or {}
+    stamp['seq'] = latest.get('id')
+    stamp['changed'] = latest.get('created')
+    return stamp
+
+
+class ReferenceDataMixin(ConditionalGetMixin):
+    """
+    Условные запросы для справочников: тегов и ингредиентов.
+    Списки кешируются в памяти процесса до изменения отпечатка данных.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.cached_list, request, *args, **kwargs)
+
+    def cached_list(self, request, *args, **kwargs):
+        key = (self.basename, request.query_params.urlencode())
+        return Response(fastpath.reference_cache.get(
+            key, self.version_stamp, self.get_rows))
+
+    def get_rows(self):
+        """Строки списка без кеша."""
+        return self.get_serializer(
+            self.filter_queryset(self.get_queryset()), many=True).data
+
+    def get_version_stamp(self):
+        return version_stamp(self.filter_queryset(self.get_queryset()))
+
+    def get_last_modified(self):
+        return max(filter(None, (self.version_stamp['updated'],
+                                 self.version_stamp['changed'])),
+                   default=None)
+
+
+class IngredientsViewset(ReferenceDataMixin,
+                         mixins.ListModelMixin,
                          mixins.RetrieveModelMixin,
                          viewsets.GenericViewSet):
     """
@@ -40,6 +128,17 @@ class IngredientsViewset(mixins.ListModelMixin,
     pagination_class = None
     filterset_class = IngredientFilter
 
+    def get_throttles(self):
+        """Поиск по началу названия ограничивается по IP-адресу."""
+        if self.action == 'list' and self.request.query_params.get('name'):
+            return [AutocompleteThrottle()]
+        return super().get_throttles()
+
+    def get_rows(self):
+        """Список ингредиентов через быстрый путь без сериализатора."""
+        return fastpath.ingredient_rows(
+            self.filter_queryset(self.get_queryset()))
+
 
 class FavoriteViewSet(viewsets.ModelViewSet):
     serializer_class = FavoriteSerializer
@@ -57,7 +156,8 @@ class FavoriteViewSet(viewsets.ModelViewSet):
             instance.delete()
 
     @action(methods=['POST', 'DELETE'], detail=True,
-            permission_classes=[IsAuthenticated])
+            permission_classes=[IsAuthenticated],
+            throttle_classes=WRITE_THROTTLES)
     def favorite(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
 
@@ -71,7 +171,13 @@ class FavoriteViewSet(viewsets.ModelViewSet):
 
             serializer = FavoriteSerializer(data=data, context=context)
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except IntegrityError:
+                return Response(
+                    {'detail': 'Рецепт уже добавлен в избранное.'},
+                    status=status.HTTP_400_BAD_REQUEST)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         elif request.method == 'DELETE':
@@ -84,7 +190,8 @@ class FavoriteViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class RecipesViewset(viewsets.ModelViewSet):
+class RecipesViewset(ConditionalGetMixin, SparseFieldsetMixin,
+                     StatementTimeoutMixin, viewsets.ModelViewSet):
     """
     Вьюсет для рецептов.
     Позволяет получать список рецептов, создавать, изменять и удалять рецепты.
@@ -97,19 +204,220 @@ class RecipesViewset(viewsets.ModelViewSet):
     ordering = ['-pub_date']
     pagination_class = PageNumberPagination
     filterset_class = RecipeFilter
+    sparse_views = {
+        'card': ('name', 'image', 'cooking_time',
+                 'is_favorited', 'is_in_shopping_cart'),
+    }
+    statement_timeouts = {
+        'list': 5000,
+        'retrieve': 2000,
+        'changes': 5000,
+        'download_shopping_cart': 15000,
+        'similar': 2000,
+        'recommended': 2000,
+    }
+    sparse_actions = ('list', 'retrieve', 'similar', 'recommended')
+    CHANGES_LIMIT = 500
+    SIMILAR_LIMIT = 20
+    RECOMMENDATION_SEEDS = 20
+    MODEL_FIELDS = frozenset(
+        ('name', 'image', 'text', 'cooking_time', 'pub_date', 'updated_at'))
 
     def get_queryset(self):
-        is_favorited = self.request.query_params.get('is_favorited')
-        if is_favorited is not None and int(is_favorited) == 1:
-            return Recipe.objects.filter(favorites__user=self.request.user)
-
-        is_in_shopping_cart = self.request.query_params.get(
-            'is_in_shopping_cart'
-        )
-        if is_in_shopping_cart is not None and int(is_in_shopping_cart) == 1:
-            return Recipe.objects.filter(shopping_cart__user=self.request.user)
+        """
+        Возвращает рецепты с автором, тегами и ингредиентами,
+        аннотированные состоянием для текущего пользователя.
+        Если запрошен разреженный набор полей, загружает только их.
+        """
+        fields = self.get_requested_fields()
+        queryset = Recipe.objects.with_user_state(self.request.user)
+        if fields is None:
+            return queryset.select_related('author').prefetch_related(
+                'tags', 'recipes_ingredients__ingredient')
+        only = {'id'} | (fields & self.MODEL_FIELDS)
+        if 'author' in fields:
+            only.add('author')
+            queryset = queryset.select_related('author')
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related(
+                'recipes_ingredients__ingredient')
+        return queryset.only(*only)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.fast_list, request, *args, **kwargs)
+
+    def fast_list(self, request, *args, **kwargs):
+        """
+        Лента рецептов через быстрый путь: страница собирается
+        запросами values() в словари схемы RecipeGetSerializer.
+        """
+        fields = self.get_requested_fields()
+        queryset = self.filter_queryset(
+            Recipe.objects.with_user_state(request.user))
+        page = self.paginate_queryset(
+            fastpath.recipe_values(queryset, fields))
+        return self.get_paginated_response(
+            fastpath.recipe_rows(page, request, fields))
+
+    def get_version_stamp(self):
+        """
+        Отпечаток рецептов: журнал изменений и даты изменения рецептов
+        и их авторов, а также состояние избранного и корзины пользователя.
+        """
+        user = self.request.user
+        queryset = Recipe.objects.with_user_state(user)
+        if self.action == 'retrieve':
+            queryset = queryset.filter(pk=self.kwargs['pk'])
+        else:
+            queryset = self.filter_queryset(queryset)
+        stamp = version_stamp(queryset)
+        stamp.update(queryset.order_by().aggregate(
+            authors=Max('author__updated_at')))
+        if self.is_trending():
+            stamp.update(queryset.order_by().aggregate(
+                trending=Sum('trending_score')))
+        if user.is_authenticated:
+            stamp['favorites'] = viewer_state(
+                self.request, 'favorites',
+                lambda: rows_stamp(Favorite.objects.filter(user=user)))
+            stamp['shopping_cart'] = viewer_state(
+                self.request, 'shopping_cart',
+                lambda: rows_stamp(ShoppingCart.objects.filter(user=user)))
+        return stamp
+
+    def is_trending(self):
+        return (self.action == 'list' and self.request.query_params.get(
+            'ordering') == RecipeFilter.TRENDING)
+
+    def get_last_modified(self):
+        """
+        Дата последнего изменения известна только для анонимных
+        пользователей: состояние избранного и корзины не датируется.
+        Изменение популярности тоже не датируется.
+        """
+        if self.request.user.is_authenticated or self.is_trending():
+            return None
+        return max(filter(None, (self.version_stamp['updated'],
+                                 self.version_stamp['changed'],
+                                 self.version_stamp['authors'])),
+                   default=None)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Возвращает изменения рецептов после номера since
+        из глобального журнала изменений.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            return Response({'since': 'Ожидается целое число.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        changes = list(Change.objects.filter(
+            model=Recipe._meta.label_lower, id__gt=since
+        )[:self.CHANGES_LIMIT + 1])
+        has_more = len(changes) > self.CHANGES_LIMIT
+        changes = changes[:self.CHANGES_LIMIT]
+        latest = {change.object_id: change for change in changes}
+        recipes = self.get_queryset().filter(pk__in=[
+            object_id for object_id, change in latest.items()
+            if change.action == Change.UPSERT
+        ]).in_bulk()
+        serializer = RecipeGetSerializer(
+            recipes.values(), many=True, context={'request': request})
+        data = {recipe['id']: recipe for recipe in serializer.data}
+        return Response({
+            'last_seq': changes[-1].id if changes else since,
+            'has_more': has_more,
+            'results': [
+                {
+                    'seq': change.id,
+                    'id': object_id,
+                    'action': (change.action
+                               if object_id in recipes else Change.DELETE),
+                    'recipe': data.get(object_id),
+                }
+                for object_id, change in sorted(
+                    latest.items(), key=lambda item: item[1].id)
+            ],
+        })
+
+    def get_limit(self, default=10):
+        """Возвращает ?limit= в пределах SIMILAR_LIMIT."""
+        try:
+            limit = int(self.request.query_params.get('limit', default))
+        except ValueError:
+            limit = default
+        return min(max(limit, 1), self.SIMILAR_LIMIT)
+
+    def ranked_rows(self, ids):
+        """Строки рецептов через быстрый путь в порядке ids."""
+        fields = self.get_requested_fields()
+        queryset = Recipe.objects.with_user_state(
+            self.request.user).filter(id__in=ids)
+        rows = fastpath.recipe_rows(
+            fastpath.recipe_values(queryset, fields), self.request, fields)
+        order = {recipe_id: index for index, recipe_id in enumerate(ids)}
+        return sorted(rows, key=lambda row: order[row['id']])
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk):
+        """
+        Рецепты, похожие на данный по избранному и корзинам
+        пользователей, из заранее рассчитанной таблицы,
+        или по ингредиентам через LSH-индекс (?by=ingredients).
+        """
+        get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        if request.query_params.get('by') == 'ingredients':
+            ids = [recipe_id for recipe_id, _ in minhash.similar_recipes(
+                pk, limit=self.get_limit())]
+        else:
+            ids = list(SimilarRecipe.objects.filter(
+                recipe_id=pk).values_list('similar_id', flat=True)[
+                    :self.get_limit()])
+        return Response(self.ranked_rows(ids))
 
-        return Recipe.objects.all()
+    @action(detail=False, methods=['get'],
+            permission_classes=(IsAuthenticated,))
+    def recommended(self, request):
+        """
+        Рекомендации пользователю: соседи последних рецептов
+        из его избранного и корзины, а без них - новые рецепты
+        авторов, на которых он подписан.
+        """
+        user = request.user
+        seeds = set(Favorite.objects.filter(user=user).order_by(
+            '-id').values_list('recipe_id', flat=True)[
+                :self.RECOMMENDATION_SEEDS])
+        seeds.update(ShoppingCart.objects.filter(user=user).order_by(
+            '-id').values_list('recipe_id', flat=True)[
+                :self.RECOMMENDATION_SEEDS])
+        ids = list(SimilarRecipe.objects.filter(
+            recipe_id__in=seeds
+        ).exclude(similar_id__in=seeds).values('similar_id').annotate(
+            total=Sum('score')
+        ).order_by('-total').values_list('similar_id', flat=True)[
+            :self.get_limit()])
+        if not ids:
+            ids = list(Recipe.objects.filter(
+                author__following_author__user=user
+            ).order_by('-pub_date').values_list('id', flat=True)[
+                :self.get_limit()])
+        return Response(self.ranked_rows(ids))
+
+    def create(self, request, *args, **kwargs):
+        """
+        Создаёт рецепт; рецепты с почти тем же набором ингредиентов
+        перечисляются в заголовке X-Near-Duplicates.
+        """
+        response = super().create(request, *args, **kwargs)
+        if self.near_duplicates:
+            response['X-Near-Duplicates'] = ','.join(
+                str(recipe_id) for recipe_id, _ in self.near_duplicates)
+        return response
 
     def perform_create(self, serializer):
         """
@@ -117,7 +425,9 @@ class RecipesViewset(viewsets.ModelViewSet):
         текущим пользователем как автором.
         """
 
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        self.near_duplicates = minhash.similar_recipes(
+            recipe.pk, threshold=settings.NEAR_DUPLICATE_THRESHOLD, limit=5)
 
     def get_serializer_class(self):
         """
@@ -129,13 +439,19 @@ class RecipesViewset(viewsets.ModelViewSet):
         return RecipeSaveSerializer
 
     def destroy(self, request, *args, **kwargs):
+        """
+        Помечает рецепт удалённым: он сразу пропадает из выдачи,
+        а зависимые строки удаляет фоновая задача.
+        """
         instance = self.get_object()
-        self.perform_destroy(instance)
+        deletion.soft_delete_recipes(Recipe.objects.filter(pk=instance.pk))
+        transaction.on_commit(reap_deleted.delay)
         return Response('Рецепт успешно удален',
                         status=status.HTTP_204_NO_CONTENT)
 
     @action(methods=['post', 'delete'], detail=True,
-            permission_classes=(IsOwnerAdmin,))
+            permission_classes=(IsOwnerAdmin,),
+            throttle_classes=WRITE_THROTTLES)
     def favorites(self, request, pk):
         """
         Добавляет или удаляет рецепт из избранного для пользователя.
@@ -148,7 +464,11 @@ class RecipesViewset(viewsets.ModelViewSet):
                                        recipe=recipe).exists():
                 return Response({'detail': 'Рецепт уже добавлен в избранное.'},
                                 status=status.HTTP_400_BAD_REQUEST)
-            new_fav = Favorite.objects.create(user=request.user, recipe=recipe)
+            new_fav, error = create_once(
+                Favorite, 'Рецепт уже добавлен в избранное.',
+                user=request.user, recipe=recipe)
+            if error is not None:
+                return error
             serializer = FavoriteSerializer(new_fav,
                                             context={'request': request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -161,7 +481,8 @@ class RecipesViewset(viewsets.ModelViewSet):
         raise MethodNotAllowed(request.method)
 
     @action(methods=['POST', 'DELETE'], detail=True,
-            permission_classes=[IsAuthenticated])
+            permission_classes=[IsAuthenticated],
+            throttle_classes=WRITE_THROTTLES)
     def shopping_cart(self, request, pk):
         recipe = self.get_object()
 
@@ -194,25 +515,71 @@ class RecipesViewset(viewsets.ModelViewSet):
         и предоставляет его для скачивания.
         """
 
-        recipes = Recipe.objects.filter(shopping_cart__user=request.user)
-        shopping_cart = RecipesIngredients.objects.filter(
-            recipe__in=recipes).values(
-            name=F('ingredient__name'),
-            units=F('ingredient__measurement_unit')).order_by(
-            'ingredient__name').annotate(total=Sum('amount'))
-        text = 'Список покупок: \n\n'
-        ingr_list = []
-        for recipe in shopping_cart:
-            ingr_list.append(recipe)
-        for i in ingr_list:
-            text += f'{i["name"]}: {i["total"]}, {i["units"]}.\n'
-        response = HttpResponse(text, content_type='text/plain')
+        response = StreamingHttpResponse(
+            iterate_with_statement_timeout(
+                RecipesIngredients,
+                self.statement_timeouts['download_shopping_cart'],
+                shopping_list_lines(request.user)),
+            content_type='text/plain')
         response['Content-Disposition'] = ('attachment;'
                                            'filename="shopping_cart.txt"')
         return response
 
 
-class TagViewset(mixins.ListModelMixin,
+class ExportJobViewSet(mixins.CreateModelMixin,
+                       mixins.ListModelMixin,
+                       mixins.RetrieveModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Вьюсет для выгрузок.
+    POST создаёт задание, которое выполняется фоновым воркером,
+    GET возвращает статус задания и ссылку на готовый файл.
+    """
+
+    serializer_class = ExportJobSerializer
+    permission_classes = (IsAuthenticated,)
+    CONTENT_TYPES = {
+        ExportJob.TXT: 'text/plain; charset=utf-8',
+        ExportJob.CSV: 'text/csv; charset=utf-8',
+    }
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        job = serializer.save(user=self.request.user)
+        transaction.on_commit(lambda: generate_export.delay(job.pk))
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Отдаёт готовый файл владельцу задания. За nginx файл
+        отдаёт nginx из внутреннего location по X-Accel-Redirect.
+        """
+        job = self.get_object()
+        if not job.file:
+            return Response({'detail': 'Файл ещё не готов.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        content_type = self.CONTENT_TYPES[job.format]
+        filename = f'{job.kind}.{job.format}'
+        if settings.EXPORTS_X_ACCEL_REDIRECT:
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.MEDIA_URL + job.file.name
+        else:
+            response = FileResponse(job.file.open('rb'),
+                                    content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"')
+        return response
+
+
+class TagViewset(ReferenceDataMixin,
+                 mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
                  viewsets.GenericViewSet):
     """
@@ -226,7 +593,8 @@ class TagViewset(mixins.ListModelMixin,
     pagination_class = None
 
 
-class UserViewset(UserViewSet):
+class UserViewset(ConditionalGetMixin, SparseFieldsetMixin,
+                  StatementTimeoutMixin, UserViewSet):
     """
     Вьюсет для работы с пользователем.
     Позволяет получать список пользователей и детали отдельных пользователей.
@@ -236,9 +604,58 @@ class UserViewset(UserViewSet):
 
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    sparse_views = {
+        'card': ('username', 'first_name', 'last_name', 'is_subscribed',
+                 'recipes_count'),
+    }
+    sparse_actions = ('list', 'retrieve', 'subscriptions')
+    statement_timeouts = {'list': 5000, 'subscriptions': 5000}
+    MODEL_FIELDS = frozenset(
+        ('email', 'username', 'first_name', 'last_name', 'is_subscribed',
+         'recipes_count', 'followers_count', 'following_count'))
+
+    def get_queryset(self):
+        """Загружает только запрошенные поля профиля."""
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields is None or self.action == 'subscriptions':
+            return queryset
+        return queryset.only('id', *(fields & self.MODEL_FIELDS))
+
+    def get_version_stamp(self):
+        """
+        Отпечаток профилей: даты изменения пользователей
+        и подписки текущего пользователя. Для одного профиля
+        берётся дата изменения его строки; собственный профиль
+        уже загружен при аутентификации, и подписки на себя
+        в нём не отражаются.
+        """
+        user = self.request.user
+        if self.action == 'me':
+            return {'id': user.pk, 'updated': user.updated_at}
+        if self.action == 'retrieve':
+            stamp = User.objects.filter(id=self.kwargs['id']).values(
+                'id', updated=F('updated_at')).first() or {}
+        else:
+            stamp = version_stamp(self.filter_queryset(self.get_queryset()))
+        if user.is_authenticated:
+            stamp['subscriptions'] = viewer_state(
+                self.request, 'subscriptions',
+                lambda: rows_stamp(Subscription.objects.filter(user=user)))
+        return stamp
+
+    def perform_destroy(self, instance):
+        """
+        Помечает пользователя удалённым; его рецепты, подписки
+        и остальные данные удаляет фоновая задача. Выход из системы
+        выполняет destroy() djoser.
+        """
+        deletion.soft_delete_users(User.objects.filter(pk=instance.pk))
+        transaction.on_commit(reap_deleted.delay)
 
     @action(methods=['POST', 'DELETE'], detail=True,
-            permission_classes=(IsAuthenticated,))
+            permission_classes=(IsAuthenticated,),
+            throttle_classes=WRITE_THROTTLES)
     def subscribe(self, request, id=None):
         """
         Добавляет или удаляет подписку на пользователя.
@@ -259,7 +676,11 @@ class UserViewset(UserViewSet):
                     'detail': 'Подписка уже существует'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            new_sub = Subscription.objects.create(user=user, author=author)
+            new_sub, error = create_once(
+                Subscription, 'Подписка уже существует',
+                user=user, author=author)
+            if error is not None:
+                return error
             serializer = SubscribeSerializer(
                 new_sub, context={'request': request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -268,7 +689,7 @@ class UserViewset(UserViewSet):
             instance = get_object_or_404(
                 Subscription, user=user, author=author
             )
-            self.perform_destroy(instance)
+            instance.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         raise MethodNotAllowed(request.method)
@@ -280,49 +701,61 @@ class UserViewset(UserViewSet):
         Получает список подписок пользователя.
         """
 
-        user = request.user
-        queryset = Subscription.objects.filter(user=user)
-        page = self.paginate_queryset(queryset)
-        serializer = SubscribeSerializer(
-            page,
-            many=True,
-            context={'request': request}
-        )
-
-        subscriptions_data = serializer.data
-
-        results = []
-        for subscription in subscriptions_data:
-            author = User.objects.get(id=subscription['author'])
-            recipes = Recipe.objects.filter(author=author)\
-                            .order_by('-pub_date')
-            recipe_data = []
-            for recipe in recipes:
-                recipe_data.append({
-                    "id": recipe.id,
-                    "name": recipe.name,
-                    "image": recipe.image.url,
-                    "cooking_time": recipe.cooking_time,
-                })
-
-            result_entry = {
-                "email": author.email,
-                "id": author.id,
-                "username": author.username,
-                "first_name": author.first_name,
-                "last_name": author.last_name,
-                "is_subscribed": True,
-                "recipes": recipe_data,
-                "recipes_count": recipes.count(),
-            }
-
-            results.append(result_entry)
+        fields = self.get_requested_fields()
+        queryset = Subscription.objects.filter(
+            user=request.user, author__deleted_at__isnull=True
+        ).order_by('id')
+        page = self.paginate_queryset(
+            queryset.values_list('author_id', flat=True))
+        results = fastpath.subscription_rows(list(page), request, fields)
 
         response_data = {
-            "count": queryset.count(),
+            "count": self.paginator.page.paginator.count,
             "next": None,
             "previous": None,
             "results": results,
         }
 
         return Response(response_data, status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """Метрики процесса в формате Prometheus, только для администраторов."""
+
+    permission_classes = (IsAdminUser,)
+    renderer_classes = (PlainTextRenderer,)
+
+    def get(self, request):
+        return Response(metrics.render())
+
+
+class EventTicketView(APIView):
+    """
+    Одноразовый билет для подключения EventSource к /api/events/
+    без токена в адресе.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        return Response({'ticket': issue_ticket(request.user),
+                         'expires_in': settings.EVENTS_TICKET_TTL})
+
+
+class BatchView(APIView):
+    """
+    Пакет запросов к API за один HTTP-запрос:
+    {"requests": [{"id": "tags", "method": "GET", "path": "/api/tags/"}]}.
+    Подзапросы выполняются с правами текущего пользователя
+    и возвращаются в том же порядке.
+    """
+
+    def post(self, request):
+        items = None
+        if isinstance(request.data, dict):
+            items = request.data.get('requests')
+        error = validate(items, settings.BATCH_MAX_REQUESTS)
+        if error is not None:
+            return Response({'requests': error},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'responses': run_batch(request, items)})
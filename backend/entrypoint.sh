@@ -1,16 +1,10 @@
 #!/bin/bash
+set -e
 
-#python manage.py flush --no-input
+# Подготовку можно вынести в отдельный одноразовый контейнер,
+# установив RUN_INIT=0 для контейнеров с gunicorn.
+if [ "${RUN_INIT:-1}" != "0" ]; then
+    ./init.sh
+fi
 
-python manage.py makemigrations
-
-python manage.py migrate
-
-python manage.py load_ingredients
-python manage.py load_tags
-
-gunicorn foodgram.wsgi:application --bind 0.0.0.0:80
-
-cp -r /app/collected_static/. /backend_static/static/
-
-#source load_env.sh
+exec gunicorn -c gunicorn.conf.py
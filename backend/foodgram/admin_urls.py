@@ -0,0 +1,9 @@
+"""
+URL-конфигурация админки. Загружается при первом обращении
+к URL-резолверу админки, вместе с регистрацией моделей.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
@@ -0,0 +1,127 @@
+"""
+Инструменты админки для больших таблиц: приблизительный подсчёт
+строк и фильтры с полем ввода вместо списка всех значений.
+"""
+from api.tasks import reap_deleted
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Для списка без фильтров и поиска количество строк берётся
+    из статистики PostgreSQL (pg_class.reltuples) вместо COUNT(*)
+    по всей таблице. Небольшие таблицы и отфильтрованные списки
+    считаются точно. Условия самого менеджера модели (например,
+    deleted_at IS NULL у мягкого удаления) фильтром не считаются:
+    помеченные строки удаляются в фоне, и оценка их включает.
+    """
+
+    EXACT_COUNT_LIMIT = 10000
+
+    def is_filtered(self, queryset):
+        """Есть ли условия сверх условий менеджера модели."""
+        base = queryset.model._default_manager.all()
+        return queryset.query.where != base.query.where
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql' or self.is_filtered(queryset):
+            return super().count
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row is None or row[0] < self.EXACT_COUNT_LIMIT:
+            return super().count
+        return row[0]
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    Фильтр с полем ввода. Стандартные фильтры по связям выводят
+    все различные значения поля, что на больших таблицах требует
+    полного просмотра; здесь значение вводится вручную и
+    применяется как lookup к запросу.
+    """
+
+    template = 'admin/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        # Непустой список нужен, чтобы фильтр был показан.
+        return ((),)
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        try:
+            return queryset.filter(**{self.lookup: value.strip()})
+        except (ValueError, ValidationError):
+            # Значение не подходит типу поля: фильтр не применяется.
+            messages.warning(
+                request, f'Фильтр по {self.title}: недопустимое '
+                f'значение «{value}».')
+            return queryset
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = (
+            (key, value)
+            for key, value in changelist.get_filters_params().items()
+            if key != self.parameter_name
+        )
+        yield all_choice
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Список без точного подсчёта: общее количество строк не
+    считается, а количество для пагинации оценивается.
+    """
+
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+
+class SoftDeleteAdmin(LargeTableAdmin):
+    """
+    Удаление помечает строки удалёнными методом soft_delete,
+    зависимые строки удаляются в фоне. Страница подтверждения
+    перечисляет только удаляемые объекты, не собирая каскад.
+    Подклассы переопределяют mark_deleted, если пометка должна
+    затрагивать и другие строки (счётчики, связанные объекты).
+    """
+
+    def mark_deleted(self, queryset):
+        queryset.update(deleted_at=timezone.now())
+
+    def soft_delete(self, queryset):
+        """Помечает строки удалёнными и запускает фоновое удаление."""
+        with transaction.atomic():
+            self.mark_deleted(queryset)
+            transaction.on_commit(reap_deleted.delay)
+
+    def delete_model(self, request, obj):
+        self.soft_delete(self.model._default_manager.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        self.soft_delete(queryset)
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return (
+            [str(obj) for obj in objs],
+            {self.model._meta.verbose_name_plural: len(objs)},
+            set(),
+            [],
+        )
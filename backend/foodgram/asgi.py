@@ -2,6 +2,8 @@
 ASGI config for foodgram project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Поток событий /api/events/ обслуживается отдельным ASGI-приложением,
+остальные запросы - Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +15,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from foodgram.sse import EventStreamApp  # noqa: E402
+
+application = EventStreamApp(django_application)
@@ -0,0 +1,216 @@
+"""
+Сжатие ответов с выбором кодировки по Accept-Encoding:
+brotli и zstd используются, если установлены пакеты Brotli
+и zstandard, gzip доступен всегда.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript',
+                      'text/')
+
+
+class GzipEncoder:
+    encoding = 'gzip'
+
+    def __init__(self):
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED,
+                                           16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliEncoder:
+    encoding = 'br'
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdEncoder:
+    encoding = 'zstd'
+
+    def __init__(self):
+        self.compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+ENCODERS = OrderedDict(
+    (encoder.encoding, encoder) for encoder, available in (
+        (BrotliEncoder, brotli is not None),
+        (ZstdEncoder, zstandard is not None),
+        (GzipEncoder, True),
+    ) if available
+)
+
+
+def choose_encoder(accept_encoding):
+    """
+    Выбирает кодировку с наибольшим весом q из поддерживаемых;
+    при равных весах предпочтение в порядке ENCODERS.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding, encoder in ENCODERS.items():
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoder, weight
+    return best
+
+
+def compress(encoder_class, data):
+    """Сжимает тело ответа целиком."""
+    encoder = encoder_class()
+    return encoder.compress(data) + encoder.finish()
+
+
+def compress_stream(encoder_class, chunks, buffer_size):
+    """
+    Сжимает потоковое тело по частям: накопленные данные
+    сбрасываются клиенту, как только их набирается buffer_size.
+    """
+    encoder = encoder_class()
+    pending = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = encoder.compress(chunk)
+        pending += len(chunk)
+        if pending >= buffer_size:
+            data += encoder.flush()
+            pending = 0
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+class VariantCache:
+    """Сжатые варианты ответов с ETag, вытесняются по LRU."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.data.get(key)
+            if value is not None:
+                self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы JSON и текстовые выгрузки.
+    Пропускает тела меньше COMPRESSION_MIN_SIZE, уже сжатые ответы
+    и медиафайлы. Потоковые ответы сжимаются по мере генерации.
+    Сжатые тела ответов с ETag кешируются по ETag, хосту, типу
+    содержимого и кодировке.
+    """
+
+    variants = VariantCache(maxsize=512)
+    MAX_CACHED_SIZE = 1024 * 1024
+    STREAM_BUFFER_SIZE = 16 * 1024
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_compress(self, response):
+        if response.status_code != 200 or response.has_header(
+                'Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '').lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        if response.streaming:
+            return True
+        return len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.should_compress(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoder = choose_encoder(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoder is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                encoder, response.streaming_content, self.STREAM_BUFFER_SIZE)
+            del response['Content-Length']
+        else:
+            etag = response.get('ETag')
+            key = (etag, request.META.get('HTTP_HOST'),
+                   response['Content-Type'], encoder.encoding)
+            body = self.variants.get(key) if etag else None
+            if body is None:
+                body = compress(encoder, response.content)
+                if etag and len(body) <= self.MAX_CACHED_SIZE:
+                    self.variants.set(key, body)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoder.encoding
+        return response
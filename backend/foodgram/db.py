@@ -0,0 +1,53 @@
+"""
+Обслуживание постоянных соединений с базой данных.
+"""
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+last_used = {}
+
+
+def check_connections(**kwargs):
+    """
+    Перед запросом проверяет постоянные соединения, простаивавшие
+    дольше DB_HEALTH_CHECK_INTERVAL, и закрывает неработоспособные,
+    чтобы запрос открыл новое соединение, а не получил ошибку.
+    """
+    now = time.monotonic()
+    for conn in connections.all():
+        if conn.connection is None:
+            continue
+        idle = now - last_used.get(conn.alias, now)
+        if idle >= settings.DB_HEALTH_CHECK_INTERVAL and not conn.is_usable():
+            conn.close()
+        last_used[conn.alias] = now
+
+
+@contextmanager
+def statement_timeout(alias, milliseconds):
+    """
+    Таймаут запросов PostgreSQL на время блока. Блок выполняется
+    в транзакции, а таймаут задаётся через SET LOCAL и действует
+    только до её завершения: сеансовый SET при пулинге транзакций
+    в PgBouncer остался бы на соединении другого клиента.
+    """
+    with transaction.atomic(using=alias):
+        conn = connections[alias]
+        if conn.vendor == 'postgresql':
+            with conn.cursor() as cursor:
+                cursor.execute('SET LOCAL statement_timeout = %s',
+                               [int(milliseconds)])
+        yield
+
+
+def iterate_with_statement_timeout(model, milliseconds, iterable):
+    """
+    Отдаёт элементы iterable с таймаутом запросов. Нужен потоковым
+    ответам: их запросы выполняются уже после обработки запроса,
+    при чтении тела ответа.
+    """
+    with statement_timeout(router.db_for_read(model), milliseconds):
+        yield from iterable
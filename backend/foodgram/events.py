@@ -0,0 +1,175 @@
+"""
+Публикация событий для потоков Server-Sent Events.
+События публикуются в каналы (author:<id>, user:<id>) через бэкенд
+из EVENTS_BACKEND: LocalBackend доставляет их подписчикам текущего
+процесса, RedisBackend - подписчикам всех процессов через Redis.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from api.metrics import metrics
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """
+    Очередь событий одного соединения в его цикле событий.
+    При переполнении отбрасываются самые старые события,
+    так что память на соединение ограничена EVENTS_QUEUE_SIZE.
+    """
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            metrics.inc('events_dropped_total')
+        self.queue.put_nowait(event)
+
+
+class Broker:
+    """Подписчики каналов текущего процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+
+    def subscribe(self, channels, subscriber):
+        with self.lock:
+            for channel in channels:
+                self.channels[channel].add(subscriber)
+
+    def unsubscribe(self, channels, subscriber):
+        with self.lock:
+            for channel in channels:
+                subscribers = self.channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self.channels[channel]
+
+    def deliver(self, channel, event):
+        """Передаёт событие в циклы событий подписчиков канала."""
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber.loop.call_soon_threadsafe(subscriber.put, event)
+        metrics.inc('events_delivered_total', value=len(subscribers))
+
+
+broker = Broker()
+
+
+class LocalBackend:
+    """События доставляются только подписчикам текущего процесса."""
+
+    def publish(self, channel, event):
+        broker.deliver(channel, event)
+
+    def start(self):
+        pass
+
+
+class RedisBackend:
+    """
+    События передаются между процессами через Redis pub/sub
+    (EVENTS_REDIS_URL). Процесс, обслуживающий потоки событий,
+    слушает каналы в отдельном потоке.
+    """
+
+    prefix = 'foodgram:events:'
+    RECONNECT_DELAY = 1
+    RECONNECT_MAX_DELAY = 30
+
+    def __init__(self):
+        import redis
+        self.client = redis.Redis.from_url(settings.EVENTS_REDIS_URL)
+        self.lock = threading.Lock()
+        self.listener = None
+
+    def publish(self, channel, event):
+        self.client.publish(self.prefix + channel, json.dumps(event))
+
+    def start(self):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(
+                    target=self.listen, name='events-listener', daemon=True)
+                self.listener.start()
+
+    def listen(self):
+        """
+        Слушает каналы; после разрыва соединения с Redis
+        переподключается с экспоненциальной задержкой до
+        RECONNECT_MAX_DELAY секунд. События, опубликованные
+        во время разрыва, теряются.
+        """
+        delay = self.RECONNECT_DELAY
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self.prefix + '*')
+                delay = self.RECONNECT_DELAY
+                for message in pubsub.listen():
+                    self.deliver(message)
+            except Exception:
+                logger.exception('Соединение с Redis потеряно, повтор '
+                                 'через %s с', delay)
+                metrics.inc('events_reconnects_total')
+            finally:
+                pubsub.close()
+            time.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+
+    def deliver(self, message):
+        channel = message['channel'].decode()[len(self.prefix):]
+        try:
+            event = json.loads(message['data'])
+        except ValueError:
+            logger.exception('Некорректное событие в канале %s', channel)
+            return
+        broker.deliver(channel, event)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(settings.EVENTS_BACKEND)()
+        return _backend
+
+
+def publish(channel, event):
+    """Публикует событие; ошибка бэкенда не прерывает запрос."""
+    try:
+        get_backend().publish(channel, event)
+    except Exception:
+        logger.exception('Не удалось опубликовать событие в %s', channel)
+
+
+def publish_on_commit(build_event):
+    """
+    Публикует событие после фиксации транзакции. build_event
+    вызывается уже после фиксации, может обращаться к базе
+    и возвращает пару (канал, событие) или None.
+    """
+    def send():
+        built = build_event()
+        if built is not None:
+            publish(*built)
+
+    transaction.on_commit(send)
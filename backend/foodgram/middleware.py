@@ -0,0 +1,163 @@
+import hashlib
+import time
+
+from api.metrics import metrics
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+
+from .routers import read_from_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает чтение с реплик для безопасных запросов.
+    После успешной записи клиент получает cookie, и в течение
+    REPLICA_STICKY_SECONDS его запросы читают основную базу,
+    чтобы он видел собственные изменения. Клиенты API, которые
+    не хранят cookie, закрепляются по заголовку Authorization
+    записью в кеше; между процессами закрепление работает только
+    с общим кешем (CACHE_BACKEND), с LocMemCache - в пределах
+    процесса.
+    """
+
+    cookie_name = 'primary_pin'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def cache_key(request):
+        """Ключ закрепления клиента по заголовку Authorization."""
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if not authorization:
+            return None
+        digest = hashlib.sha256(authorization.encode()).hexdigest()
+        return f'primary_pin:{digest}'
+
+    def is_pinned(self, request):
+        pinned = request.COOKIES.get(self.cookie_name, '')
+        if pinned.isdigit() and int(pinned) > time.time():
+            return True
+        key = self.cache_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def __call__(self, request):
+        token = read_from_replica.set(
+            request.method in SAFE_METHODS and not self.is_pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                self.cookie_name,
+                str(int(time.time()) + settings.REPLICA_STICKY_SECONDS),
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+            key = self.cache_key(request)
+            if key is not None:
+                cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+
+class InstrumentationMiddleware:
+    """
+    Длительность обработки запроса: метрика по маршруту и статусу
+    и заголовок Server-Timing для клиента.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        metrics.observe(
+            'http_request_duration_seconds', elapsed,
+            method=request.method,
+            route=match.route if match is not None else 'unmatched',
+            status=f'{response.status_code // 100}xx',
+        )
+        response['Server-Timing'] = f'app;dur={elapsed * 1000:.1f}'
+        return response
+
+
+class MiddlewareStack:
+    """
+    Цепочка middleware, собранная так же, как её собирает
+    BaseHandler.load_middleware: с обработчиками process_view,
+    process_exception и process_template_response.
+    """
+
+    def __init__(self, paths, get_response):
+        self.view_hooks = []
+        self.exception_hooks = []
+        self.template_response_hooks = []
+        handler = get_response
+        for path in reversed(paths):
+            middleware = import_string(path)(handler)
+            if hasattr(middleware, 'process_view'):
+                self.view_hooks.insert(0, middleware.process_view)
+            if hasattr(middleware, 'process_exception'):
+                self.exception_hooks.append(middleware.process_exception)
+            if hasattr(middleware, 'process_template_response'):
+                self.template_response_hooks.append(
+                    middleware.process_template_response)
+            handler = convert_exception_to_response(middleware)
+        self.handler = handler
+
+
+class PathRoutedMiddleware:
+    """
+    Выбирает цепочку middleware по префиксу пути из MIDDLEWARE_ROUTES:
+    API с аутентификацией по токену обходится без сессий, CSRF
+    и сообщений, которые нужны только админке.
+    Обработчики process_view, process_exception и
+    process_template_response вложенной цепочки вызываются через
+    одноимённые методы диспетчера.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.routes = [
+            (prefix, MiddlewareStack(paths, get_response))
+            for prefix, paths in settings.MIDDLEWARE_ROUTES
+        ]
+
+    def get_stack(self, request):
+        stack = getattr(request, '_middleware_stack', None)
+        if stack is None:
+            stack = next(stack for prefix, stack in self.routes
+                         if request.path_info.startswith(prefix))
+            request._middleware_stack = stack
+        return stack
+
+    def __call__(self, request):
+        return self.get_stack(request).handler(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        for hook in self.get_stack(request).view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_exception(self, request, exception):
+        for hook in self.get_stack(request).exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+    def process_template_response(self, request, response):
+        for hook in self.get_stack(request).template_response_hooks:
+            response = hook(request, response)
+        return response
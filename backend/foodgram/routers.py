@@ -0,0 +1,79 @@
+"""
+Маршрутизация чтения на реплики базы данных.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+replica_lag_cache = {}
+
+
+def replica_lag(alias):
+    """
+    Возвращает отставание реплики в секундах; результат кешируется
+    на REPLICA_LAG_CHECK_INTERVAL. Недоступная реплика считается
+    бесконечно отстающей.
+    """
+    now = time.monotonic()
+    checked, lag = replica_lag_cache.get(alias, (None, None))
+    if checked is not None and now - checked < (
+            settings.REPLICA_LAG_CHECK_INTERVAL):
+        return lag
+    conn = connections[alias]
+    try:
+        if conn.vendor != 'postgresql':
+            lag = 0
+        else:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    'SELECT CASE WHEN pg_last_wal_receive_lsn() '
+                    '= pg_last_wal_replay_lsn() THEN 0 ELSE COALESCE('
+                    'EXTRACT(EPOCH FROM now() '
+                    '- pg_last_xact_replay_timestamp()), 0) END'
+                )
+                lag = float(cursor.fetchone()[0])
+    except Exception:
+        lag = float('inf')
+    replica_lag_cache[alias] = (now, lag)
+    return lag
+
+
+def available_replicas():
+    """Реплики, отставание которых не превышает REPLICA_MAX_LAG."""
+    return [alias for alias in settings.DB_REPLICAS
+            if replica_lag(alias) <= settings.REPLICA_MAX_LAG]
+
+
+class PrimaryReplicaRouter:
+    """
+    Чтение внутри безопасных запросов идёт на случайную реплику,
+    запись и всё остальное - на основную базу. После первой записи
+    в рамках запроса чтение тоже переключается на основную базу.
+    Если на одной из реплик открыта транзакция, чтение идёт на неё.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not read_from_replica.get():
+            return DEFAULT_DB_ALIAS
+        replicas = available_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        for alias in replicas:
+            if connections[alias].in_atomic_block:
+                return alias
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        read_from_replica.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
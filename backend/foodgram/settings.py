@@ -11,7 +11,7 @@ DEBUG = bool(os.getenv('DEBUG', ''))
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '127.0.0.1').split(',')
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -24,13 +24,18 @@ INSTALLED_APPS = [
     'api',
     'recipes',
     'users',
+    'tasks',
     'corsheaders',
 ]
 
-MIDDLEWARE = [
+# Полная цепочка middleware для админки и прочих страниц.
+FULL_MIDDLEWARE = [
+    'foodgram.middleware.InstrumentationMiddleware',
+    'foodgram.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'foodgram.middleware.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -38,12 +43,39 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# API аутентифицируется по токену: сессии, CSRF, сообщения
+# и AuthenticationMiddleware ему не нужны.
+API_MIDDLEWARE = [
+    'foodgram.middleware.InstrumentationMiddleware',
+    'foodgram.compression.CompressionMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'foodgram.middleware.ReplicaRoutingMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+# Ответы меньше этого размера, байт, не сжимаются.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
+MIDDLEWARE_ROUTES = (
+    ('/api/', API_MIDDLEWARE),
+    ('', FULL_MIDDLEWARE),
+)
+
+MIDDLEWARE = [
+    'foodgram.middleware.PathRoutedMiddleware',
+]
+
+# Проверки админки ищут сессии, аутентификацию и сообщения
+# в MIDDLEWARE, а они подключаются через MIDDLEWARE_ROUTES.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -58,6 +90,16 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+# Постоянные соединения: время жизни в секундах (0 - закрывать после
+# каждого запроса, пусто - без ограничения).
+DB_CONN_MAX_AGE = os.getenv('DB_CONN_MAX_AGE', '60')
+DB_CONN_MAX_AGE = int(DB_CONN_MAX_AGE) if DB_CONN_MAX_AGE else None
+# Проверка постоянного соединения перед запросом, если оно простаивало
+# дольше указанного числа секунд.
+DB_HEALTH_CHECK_INTERVAL = int(os.getenv('DB_HEALTH_CHECK_INTERVAL', 30))
+# Таймаут запросов к PostgreSQL по умолчанию, мс (0 - без таймаута).
+DB_STATEMENT_TIMEOUT = int(os.getenv('DB_STATEMENT_TIMEOUT', 0))
+
 if os.getenv('USE_POSTGRES_DB'):
     DATABASES = {
         'default': {
@@ -66,7 +108,15 @@ if os.getenv('USE_POSTGRES_DB'):
             'USER': os.getenv('POSTGRES_USER'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
             'HOST': os.getenv('DB_HOST'),
-            'PORT': os.getenv('DB_PORT')
+            'PORT': os.getenv('DB_PORT'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            # За пулером PgBouncer в режиме транзакций серверные курсоры
+            # не работают.
+            'DISABLE_SERVER_SIDE_CURSORS': bool(os.getenv('DB_PGBOUNCER')),
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+                'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT}',
+            },
         }
     }
 else:
@@ -74,9 +124,30 @@ else:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
         }
     }
 
+# Реплики для чтения: хосты через запятую (для SQLite - пути к файлам),
+# остальные параметры совпадают с основной базой.
+DB_REPLICA_KEY = 'NAME' if 'sqlite' in DATABASES['default']['ENGINE'] else 'HOST'
+for index, replica in enumerate(filter(None, os.getenv(
+        'DB_REPLICA_HOSTS', '').split(','))):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        DB_REPLICA_KEY: replica.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['foodgram.routers.PrimaryReplicaRouter']
+# Время, в течение которого клиент после записи читает основную базу, с:
+# по cookie primary_pin или, для клиентов без cookie, по заголовку
+# Authorization в кеше (между процессами - только с общим кешем).
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+# Максимально допустимое отставание реплики, с.
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 5))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 1))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -109,6 +180,9 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.getenv("MEDIA_ROOT")
+# Файлы выгрузок отдаёт nginx по заголовку X-Accel-Redirect
+# из internal-location /media/exports/.
+EXPORTS_X_ACCEL_REDIRECT = bool(os.getenv('EXPORTS_X_ACCEL_REDIRECT', ''))
 
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10 MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10 MB
@@ -117,19 +191,74 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_URLS_REGEX = r'^/api/.*$'
+CORS_EXPOSE_HEADERS = ['X-Near-Duplicates']
+
+# Оценка сходства наборов ингредиентов, начиная с которой
+# новый рецепт считается почти копией существующего.
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', 0.8))
+
+# Общий кеш нужен, чтобы ограничения частоты запросов и кеш токенов
+# действовали для всех процессов, например django_redis.cache.RedisCache
+# с CACHE_LOCATION=redis://redis:6379/1.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Кеш пользователей токенов: в памяти процесса и в общем кеше, секунд.
+AUTH_TOKEN_LOCAL_TTL = int(os.getenv('AUTH_TOKEN_LOCAL_TTL', 10))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 300))
+
+# Пакетные запросы /api/batch/: размер пакета и число потоков
+# общего пула процесса для параллельного выполнения GET-подзапросов.
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 20))
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 4))
+
+# Поток событий /api/events/ (ASGI): бэкенд доставки
+# (foodgram.events.LocalBackend или foodgram.events.RedisBackend),
+# размер очереди соединения, интервал пинга, секунд, предел
+# соединений на процесс и срок действия билета на подключение, секунд.
+EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'foodgram.events.LocalBackend')
+EVENTS_REDIS_URL = os.getenv('EVENTS_REDIS_URL', 'redis://localhost:6379/0')
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 32))
+EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', 15))
+EVENTS_MAX_CONNECTIONS = int(os.getenv('EVENTS_MAX_CONNECTIONS', 5000))
+EVENTS_TICKET_TTL = int(os.getenv('EVENTS_TICKET_TTL', 30))
+
+# Размер пачки при окончательном удалении рецептов и пользователей.
+REAPER_BATCH_SIZE = int(os.getenv('REAPER_BATCH_SIZE', 1000))
+# Номеров журнала изменений в одной транзакции сжатия.
+CHANGES_COMPACT_BATCH_SIZE = int(os.getenv('CHANGES_COMPACT_BATCH_SIZE', 10000))
+
+# Рейтинг популярности рецептов: период полураспада вклада
+# события, часов, и веса событий по моделям.
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', 24))
+TRENDING_WEIGHTS = {'favorite': 1.0, 'shoppingcart': 0.5}
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
-    ]
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'write_user': os.getenv('THROTTLE_WRITE_USER', '30/min'),
+        'write_ip': os.getenv('THROTTLE_WRITE_IP', '120/min'),
+        'autocomplete': os.getenv('THROTTLE_AUTOCOMPLETE', '20/s'),
+    },
 }
 
 DJOSER = {
@@ -144,3 +273,18 @@ DJOSER = {
         'user': 'api.serializers.UserSerializer',
     },
 }
+
+# Очередь фоновых задач: tasks.backends.DatabaseBackend (воркер
+# run_tasks_worker), ThreadBackend (потоки в процессе приложения),
+# ImmediateBackend (синхронно) или класс стороннего брокера.
+TASKS_BACKEND = os.getenv('TASKS_BACKEND', 'tasks.backends.DatabaseBackend')
+TASKS_THREADS = int(os.getenv('TASKS_THREADS', 2))
+# Срок захвата задачи воркером, с. Воркер продлевает захват, пока
+# задача выполняется; задачу остановившегося воркера заберёт другой.
+TASKS_LEASE_SECONDS = int(os.getenv('TASKS_LEASE_SECONDS', 300))
+# Периодические задачи: имя задачи - интервал запуска, с. Их ставит
+# в очередь воркер run_tasks_worker.
+TASKS_SCHEDULE = {
+    'api.tasks.compact_changes': 3600,
+    'api.tasks.rescale_trending': 24 * 3600,
+}
@@ -0,0 +1,189 @@
+"""
+ASGI-приложение потока Server-Sent Events /api/events/.
+Соединение подписывается на каналы авторов, на которых подписан
+пользователь, и на собственный канал для изменений подписок.
+Токен передаётся только заголовком Authorization: токен в адресе
+попал бы в журналы доступа. EventSource в браузере не умеет
+задавать заголовки, поэтому он сначала получает одноразовый билет
+POST /api/events/ticket/ и подключается с параметром ticket.
+Билет подписан SECRET_KEY, действует EVENTS_TICKET_TTL секунд
+и годится только для потока событий; повторное использование
+отклоняется через общий кеш. После обрыва соединения клиент
+запрашивает новый билет.
+"""
+import asyncio
+import json
+import secrets
+from urllib.parse import parse_qs
+
+from api.authentication import CachedTokenAuthentication
+from api.metrics import metrics
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+from users.models import Subscription
+
+from .events import Subscriber, broker, get_backend
+
+TICKET_SALT = 'foodgram.sse.ticket'
+
+
+def issue_ticket(user):
+    """Одноразовый билет на подключение пользователя к потоку."""
+    return signing.dumps(
+        {'user': user.pk, 'nonce': secrets.token_urlsafe(16)},
+        salt=TICKET_SALT)
+
+
+def redeem_ticket(ticket):
+    """
+    Идентификатор пользователя билета или None, если билет
+    подделан, истёк или уже использован.
+    """
+    try:
+        data = signing.loads(ticket, salt=TICKET_SALT,
+                             max_age=settings.EVENTS_TICKET_TTL)
+    except signing.BadSignature:
+        return None
+    if not cache.add(f'events_ticket:{data["nonce"]}', True,
+                     settings.EVENTS_TICKET_TTL):
+        return None
+    return data['user']
+
+
+def authenticate(scope):
+    """Пользователь по заголовку Authorization или билету ticket."""
+    headers = dict(scope.get('headers') or ())
+    authorization = headers.get(b'authorization', b'').decode()
+    if authorization.startswith('Token '):
+        key = authorization[len('Token '):].strip()
+        user, _ = CachedTokenAuthentication().authenticate_credentials(key)
+        return user
+    query = parse_qs(scope.get('query_string', b'').decode())
+    ticket = (query.get('ticket') or [None])[0]
+    user_id = redeem_ticket(ticket) if ticket else None
+    user = None
+    if user_id is not None:
+        user = get_user_model().objects.filter(
+            pk=user_id, is_active=True).first()
+    if user is None:
+        raise AuthenticationFailed()
+    return user
+
+
+def load_viewer(scope):
+    """Возвращает пользователя соединения и авторов его подписок."""
+    try:
+        user = authenticate(scope)
+        authors = list(Subscription.objects.filter(
+            user=user).values_list('author_id', flat=True))
+    except AuthenticationFailed:
+        return None, ()
+    finally:
+        close_old_connections()
+    return user, authors
+
+
+def format_event(event):
+    return (f'event: {event["type"]}\n'
+            f'data: {json.dumps(event, ensure_ascii=False)}\n\n').encode()
+
+
+class EventStreamApp:
+    """
+    Обслуживает /api/events/ и передаёт остальные запросы
+    Django-приложению.
+    """
+
+    path = '/api/events/'
+
+    def __init__(self, application):
+        self.application = application
+        self.connections = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != self.path:
+            return await self.application(scope, receive, send)
+        return await self.stream(scope, receive, send)
+
+    async def respond(self, send, status, body):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body',
+                    'body': json.dumps({'detail': body}).encode()})
+
+    async def stream(self, scope, receive, send):
+        user, authors = await sync_to_async(load_viewer)(scope)
+        if user is None:
+            return await self.respond(
+                send, 401, 'Учетные данные не были предоставлены.')
+        if self.connections >= settings.EVENTS_MAX_CONNECTIONS:
+            return await self.respond(send, 503, 'Слишком много соединений.')
+
+        get_backend().start()
+        subscriber = Subscriber(asyncio.get_running_loop(),
+                                settings.EVENTS_QUEUE_SIZE)
+        channels = {f'user:{user.pk}'} | {
+            f'author:{author}' for author in authors}
+        broker.subscribe(channels, subscriber)
+        self.connections += 1
+        metrics.set('events_connections', self.connections)
+        disconnect = asyncio.ensure_future(self.wait_disconnect(receive))
+        next_event = None
+        try:
+            await send({
+                'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'text/event-stream'),
+                            (b'cache-control', b'no-cache'),
+                            (b'x-accel-buffering', b'no')],
+            })
+            await send({'type': 'http.response.body',
+                        'body': b'retry: 5000\n\n', 'more_body': True})
+            while True:
+                if next_event is None:
+                    next_event = asyncio.ensure_future(
+                        subscriber.queue.get())
+                done, _ = await asyncio.wait(
+                    {next_event, disconnect},
+                    timeout=settings.EVENTS_HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED)
+                if disconnect in done:
+                    break
+                if next_event in done:
+                    event = next_event.result()
+                    next_event = None
+                    self.follow(event, channels, subscriber)
+                    body = format_event(event)
+                else:
+                    body = b': ping\n\n'
+                await send({'type': 'http.response.body', 'body': body,
+                            'more_body': True})
+        finally:
+            for task in (next_event, disconnect):
+                if task is not None:
+                    task.cancel()
+            broker.unsubscribe(channels, subscriber)
+            self.connections -= 1
+            metrics.set('events_connections', self.connections)
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    def follow(event, channels, subscriber):
+        """Подписка и отписка меняют каналы открытого соединения."""
+        if event['type'] not in ('subscribed', 'unsubscribed'):
+            return
+        channel = f'author:{event["author"]}'
+        if event['type'] == 'subscribed':
+            channels.add(channel)
+            broker.subscribe((channel,), subscriber)
+        else:
+            channels.discard(channel)
+            broker.unsubscribe((channel,), subscriber)
@@ -1,10 +1,13 @@
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib import admin
-from django.urls import include, path
+from django.urls import URLResolver, include, path
+from django.urls.resolvers import RoutePattern
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    # Админка и модули admin.py приложений загружаются при первом
+    # обращении к её адресам, а не при старте процесса.
+    URLResolver(RoutePattern('admin/'), 'foodgram.admin_urls',
+                app_name='admin', namespace='admin'),
     path('api/', include('api.urls', namespace='api')),
 ]
 
@@ -0,0 +1,33 @@
+"""
+Прогрев процесса перед приёмом запросов.
+"""
+import logging
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_PATHS = ('/api/tags/', '/api/ingredients/')
+
+
+def warm_up():
+    """
+    Выполняет внутренние запросы к справочникам: загружаются
+    URL-конфигурация и модули представлений, открывается соединение
+    с базой и заполняется кеш справочных данных.
+    """
+    host = next((host for host in settings.ALLOWED_HOSTS
+                 if host and '*' not in host), 'localhost')
+    client = Client(HTTP_HOST=host)
+    for path in WARM_UP_PATHS:
+        try:
+            response = client.get(path)
+        except Exception:
+            logger.exception('Прогрев %s завершился ошибкой', path)
+            continue
+        if response.status_code != 200:
+            logger.warning('Прогрев %s: статус %s',
+                           path, response.status_code)
+    connections.close_all()
@@ -0,0 +1,53 @@
+"""
+Настройки gunicorn. Значения по умолчанию рассчитаны на продакшен
+и переопределяются переменными окружения GUNICORN_*.
+"""
+import multiprocessing
+import os
+
+
+def env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:80')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# gthread - потоки внутри процесса на время ожидания базы данных;
+# gevent требует установленного пакета gevent.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+# Приложение импортируется один раз в мастер-процессе, воркеры
+# получают его копией при fork.
+preload_app = env_bool('GUNICORN_PRELOAD', True)
+# Перезапуск воркеров со случайным разбросом, чтобы они
+# не перезапускались одновременно.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+warm_up = env_bool('GUNICORN_WARM_UP', True)
+
+# Поток событий обслуживается ASGI-приложением: GUNICORN_APP=
+# foodgram.asgi:application и uvicorn.workers.UvicornWorker.
+wsgi_app = os.getenv('GUNICORN_APP', 'foodgram.wsgi:application')
+
+
+def post_fork(server, worker):
+    """
+    Соединения с базой, открытые в мастер-процессе при preload_app,
+    не должны использоваться воркерами совместно.
+    """
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    """Прогревает воркер до приёма первого запроса."""
+    if warm_up:
+        from foodgram.warmup import warm_up as run_warm_up
+        run_warm_up()
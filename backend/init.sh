@@ -0,0 +1,14 @@
+#!/bin/bash
+# Однократная подготовка окружения перед запуском серверов приложения.
+# Все шаги идемпотентны и могут выполняться при каждом развёртывании.
+set -e
+
+python manage.py migrate --no-input
+
+python manage.py load_ingredients
+python manage.py load_tags
+
+if [ -d /backend_static ]; then
+    mkdir -p /backend_static/static
+    cp -r /app/collected_static/. /backend_static/static/
+fi
@@ -1,42 +1,87 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from foodgram.admin_utils import InputFilter, LargeTableAdmin, SoftDeleteAdmin
 
+from .deletion import soft_delete_recipes
 from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
 
 
+class AuthorFilter(InputFilter):
+    title = 'автору'
+    parameter_name = 'author'
+    lookup = 'author__username'
+
+
+class UserFilter(InputFilter):
+    title = 'пользователю'
+    parameter_name = 'user'
+    lookup = 'user__username'
+
+
+class RecipeIdFilter(InputFilter):
+    title = 'id рецепта'
+    parameter_name = 'recipe'
+    lookup = 'recipe_id'
+
+
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     """Модель тегов в админке."""
     list_display = ('name', 'slug')
+    search_fields = ('name', 'slug')
 
 
 @admin.register(Ingredient)
-class IngredientAdmin(admin.ModelAdmin):
+class IngredientAdmin(LargeTableAdmin):
     """Модель ингредиентов в админке."""
     list_display = ('name', 'measurement_unit')
-    list_filter = ['name']
-    search_fields = ('name',)
+    search_fields = ('^name',)
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
-    """Модель рецептов в админке."""
+class RecipeAdmin(SoftDeleteAdmin):
+    """
+    Модель рецептов в админке. Количество добавлений в избранное
+    считается подзапросом только для рецептов текущей страницы.
+    """
+
+    list_display = ('id', 'name', 'author', 'favorites_count')
+    list_select_related = ('author',)
+    list_filter = (AuthorFilter, 'tags')
+    search_fields = ('^name',)
+    autocomplete_fields = ('author', 'tags')
+
+    def get_queryset(self, request):
+        favorites = Favorite.objects.filter(
+            recipe=OuterRef('pk')).order_by().values('recipe').annotate(
+            count=Count('id')).values('count')
+        return super().get_queryset(request).annotate(
+            favorites_count=Coalesce(
+                Subquery(favorites, output_field=IntegerField()), 0))
 
-    list_display = ('id', 'name', 'author')
-    list_filter = ('name', 'author', 'tags')
+    @admin.display(description='В избранном')
+    def favorites_count(self, obj):
+        return obj.favorites_count
 
-    def in_favorite(self, obj):
-        count = obj.in_favorite.all().count()
-        return count
+    def mark_deleted(self, queryset):
+        soft_delete_recipes(queryset)
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdmin):
     """Модель избранного в админке."""
 
     list_display = ('id', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    list_filter = (UserFilter, RecipeIdFilter)
+    raw_id_fields = ('user', 'recipe')
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(LargeTableAdmin):
     """Модель списка покупок в админке."""
     list_display = ('id', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    list_filter = (UserFilter, RecipeIdFilter)
+    raw_id_fields = ('user', 'recipe')
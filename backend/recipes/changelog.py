@@ -0,0 +1,33 @@
+"""
+Сжатие журнала изменений. Клиенту синхронизации нужна только
+последняя запись по каждому объекту, поэтому более старые записи
+того же объекта можно удалять: продолжение с любого номера since
+после сжатия возвращает то же состояние. Размер журнала тогда
+ограничен количеством объектов, а не количеством сохранений.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Change
+
+
+def compact(batch_size):
+    """
+    Удаляет записи, для объекта которых есть более новая запись.
+    Журнал просматривается по batch_size номеров, каждая пачка
+    в отдельной транзакции. Возвращает количество удалённых записей.
+    """
+    newer = Change.objects.filter(
+        model=OuterRef('model'), object_id=OuterRef('object_id'),
+        id__gt=OuterRef('id'))
+    ids = Change.objects.order_by('id').values_list('id', flat=True)
+    start = ids.first()
+    deleted = 0
+    while start is not None:
+        end = start + batch_size
+        with transaction.atomic():
+            deleted += Change.objects.filter(
+                id__gte=start, id__lt=end
+            ).filter(Exists(newer)).delete()[0]
+        start = ids.filter(id__gte=end).first()
+    return deleted
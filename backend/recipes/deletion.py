@@ -0,0 +1,175 @@
+"""
+Отложенное удаление рецептов и пользователей.
+Удаление помечает строку датой deleted_at, и менеджеры objects
+сразу перестают её возвращать. Задача reap_deleted затем удаляет
+зависимые строки пачками в коротких транзакциях, потом сами
+строки и, после фиксации, файлы картинок.
+"""
+import logging
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import Count, Exists, Min, OuterRef
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from users.counters import (adjust_counters, release_subscriptions,
+                            users_updated)
+from users.models import Subscription
+
+from .models import Change, Recipe
+from .signals import log_changes
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+
+def soft_delete_recipes(queryset):
+    """
+    Помечает рецепты удалёнными, уменьшает счётчики авторов
+    и возвращает количество помеченных рецептов.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(Recipe.all_objects.filter(
+            pk__in=queryset.values('pk'), deleted_at__isnull=True
+        ).order_by('pk').select_for_update().values_list(
+            'pk', 'author_id'))
+        ids = [pk for pk, _ in rows]
+        Recipe.all_objects.filter(pk__in=ids).update(
+            deleted_at=now, updated_at=now)
+        log_changes(Recipe, ids, Change.DELETE)
+        authors = Counter(author_id for _, author_id in rows)
+        for author_id, count in authors.items():
+            adjust_counters(User, author_id, recipes_count=-count)
+    return len(ids)
+
+
+def soft_delete_users(queryset):
+    """
+    Помечает пользователей и их рецепты удалёнными и удаляет их
+    токены. Имя и почта освобождаются сразу, чтобы их можно было
+    снова зарегистрировать до окончательного удаления. Счётчики
+    подписок и подписчиков остальных пользователей уменьшаются
+    сразу, хотя сами подписки удаляются позже.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(User.all_objects.filter(
+            pk__in=queryset.values('pk'), deleted_at__isnull=True
+        ).order_by('pk').select_for_update().values_list('pk', flat=True))
+        for pk in ids:
+            User.all_objects.filter(pk=pk).update(
+                deleted_at=now, updated_at=now, is_active=False,
+                username=f'~deleted-{pk}',
+                email=f'~deleted-{pk}@deleted.invalid',
+            )
+        users_updated.send(sender=User, ids=ids)
+        log_changes(User, ids, Change.DELETE)
+        release_subscriptions(User, Subscription, ids)
+        soft_delete_recipes(Recipe.objects.filter(author_id__in=ids))
+        Token.objects.filter(user_id__in=ids).delete()
+    return len(ids)
+
+
+def cascade_relations(model):
+    """
+    Модели и поля, ссылающиеся на модель с on_delete=CASCADE,
+    включая таблицы связей ManyToMany.
+    """
+    return [
+        (relation.related_model, relation.field.name)
+        for relation in model._meta.get_fields(include_hidden=True)
+        if relation.auto_created and not relation.concrete
+        and (relation.one_to_many or relation.one_to_one)
+        and relation.on_delete is models.CASCADE
+    ]
+
+
+def delete_dependents(model, field, parent_ids, batch_size):
+    """
+    Удаляет строки model, ссылающиеся на parent_ids, пачками
+    по batch_size, каждую пачку в отдельной транзакции.
+    """
+    rows = model._base_manager.filter(**{f'{field}__in': parent_ids})
+    deleted = 0
+    while True:
+        batch = list(rows.order_by().values_list('pk', flat=True)[
+            :batch_size])
+        if not batch:
+            return deleted
+        with transaction.atomic():
+            deleted += model._base_manager.filter(pk__in=batch).delete()[0]
+
+
+def remove_files(model, files):
+    """Удаляет файлы, на которые больше не ссылается ни одна строка."""
+    for field, names in files.items():
+        used = set(model.all_objects.filter(
+            **{f'{field.name}__in': names}
+        ).values_list(field.name, flat=True))
+        for name in set(names) - used:
+            try:
+                field.storage.delete(name)
+            except OSError:
+                logger.exception('Не удалось удалить файл %s', name)
+
+
+def reap_model(model, pending, batch_size):
+    """
+    Окончательно удаляет строки из pending по batch_size за раз:
+    сначала зависимые строки, затем сами строки.
+    """
+    relations = cascade_relations(model)
+    file_fields = [field for field in model._meta.concrete_fields
+                   if isinstance(field, models.FileField)]
+    total = 0
+    while True:
+        ids = list(pending.order_by('deleted_at', 'pk').values_list(
+            'pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        for related_model, field in relations:
+            delete_dependents(related_model, field, ids, batch_size)
+        with transaction.atomic():
+            rows = model.all_objects.filter(pk__in=ids)
+            files = {
+                field: [name for name in rows.values_list(
+                    field.name, flat=True) if name]
+                for field in file_fields
+            }
+            rows.delete()
+            transaction.on_commit(
+                lambda files=files: remove_files(model, files))
+        total += len(ids)
+
+
+def reap(batch_size):
+    """
+    Удаляет помеченные рецепты, затем помеченных пользователей,
+    у которых не осталось рецептов. Возвращает количество
+    удалённых строк по моделям.
+    """
+    recipes = reap_model(
+        Recipe, Recipe.all_objects.filter(deleted_at__isnull=False),
+        batch_size)
+    users = reap_model(
+        User, User.all_objects.filter(deleted_at__isnull=False).exclude(
+            Exists(Recipe.all_objects.filter(author=OuterRef('pk')))),
+        batch_size)
+    return {'recipes': recipes, 'users': users}
+
+
+def backlog_metrics(registry):
+    """Количество и возраст строк, ожидающих удаления."""
+    now = timezone.now()
+    for name, model in (('recipe', Recipe), ('user', User)):
+        backlog = model.all_objects.filter(
+            deleted_at__isnull=False).aggregate(
+            count=Count('pk'), oldest=Min('deleted_at'))
+        age = 0.0
+        if backlog['oldest'] is not None:
+            age = (now - backlog['oldest']).total_seconds()
+        registry.set('deletion_backlog', backlog['count'], model=name)
+        registry.set('deletion_backlog_oldest_seconds', age, model=name)
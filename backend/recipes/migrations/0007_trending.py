@@ -0,0 +1,37 @@
+# Generated by Django 3.2.3 on 2026-10-19 16:00
+
+import time
+
+from django.db import migrations, models
+
+
+def create_state(apps, schema_editor):
+    TrendingState = apps.get_model('recipes', 'TrendingState')
+    TrendingState.objects.get_or_create(pk=1, defaults={'epoch': time.time()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_minhash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch', models.FloatField(verbose_name='Начало отсчёта, секунды Unix')),
+            ],
+            options={
+                'verbose_name': 'Состояние рейтинга популярности',
+                'verbose_name_plural': 'Состояние рейтинга популярности',
+            },
+        ),
+        migrations.RunPython(create_state, migrations.RunPython.noop),
+    ]
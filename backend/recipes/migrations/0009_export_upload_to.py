@@ -0,0 +1,19 @@
+# Generated by Django 3.2.3 on 2026-10-19 18:00
+
+from django.db import migrations, models
+import recipes.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='file',
+            field=models.FileField(blank=True, upload_to=recipes.models.export_upload_to, verbose_name='Файл'),
+        ),
+    ]
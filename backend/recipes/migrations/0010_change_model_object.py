@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-19 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_export_upload_to'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['model', 'object_id', 'id'], name='change_model_object'),
+        ),
+    ]
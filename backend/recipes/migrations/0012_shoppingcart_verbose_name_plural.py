@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-19 22:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_tag_ordering'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='shoppingcart',
+            options={'verbose_name': 'Список покупок', 'verbose_name_plural': 'Списки покупок'},
+        ),
+    ]
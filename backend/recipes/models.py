@@ -1,3 +1,5 @@
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
@@ -25,8 +27,14 @@ class Tag(models.Model):
         unique=True,
         max_length=50,
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Дата изменения",
+    )
 
     class Meta:
+        ordering = ('id', )
         verbose_name = "Тег"
         verbose_name_plural = "Теги"
 
@@ -45,6 +53,11 @@ class Ingredient(models.Model):
         max_length=20,
         verbose_name="Единица измерения",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Дата изменения",
+    )
 
     class Meta:
         verbose_name = "Ингредиент"
@@ -54,6 +67,36 @@ class Ingredient(models.Model):
         return f'{self.name}, {self.measurement_unit}'
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Набор запросов для рецептов."""
+
+    def with_user_state(self, user):
+        """
+        Аннотирует рецепты флагами is_favorited и is_in_shopping_cart
+        для текущего пользователя через подзапросы EXISTS.
+        """
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=models.Value(
+                    False, output_field=models.BooleanField()),
+                is_in_shopping_cart=models.Value(
+                    False, output_field=models.BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user, recipe=models.OuterRef('pk'))),
+            is_in_shopping_cart=models.Exists(ShoppingCart.objects.filter(
+                user=user, recipe=models.OuterRef('pk'))),
+        )
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+    """Рецепты без помеченных на удаление."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Recipe(models.Model):
     """Создание модели рецепта."""
 
@@ -94,6 +137,27 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name="Дата публикации"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Дата изменения",
+    )
+    trending_score = models.FloatField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name="Популярность",
+    )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name="Дата удаления",
+    )
+
+    objects = RecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ('-pub_date', )
@@ -179,6 +243,7 @@ class ShoppingCart(models.Model):
 
     class Meta:
         verbose_name = 'Список покупок'
+        verbose_name_plural = 'Списки покупок'
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'recipe'],
@@ -188,3 +253,257 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.recipe} в списке у {self.user}'
+
+
+class Change(models.Model):
+    """
+    Журнал изменений. Номер записи служит глобальной монотонно
+    возрастающей последовательностью для инкрементальной синхронизации.
+    """
+
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+
+    ACTIONS = (
+        (UPSERT, 'Создание или изменение'),
+        (DELETE, 'Удаление'),
+    )
+
+    model = models.CharField(
+        max_length=50,
+        verbose_name="Модель",
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name="Идентификатор объекта",
+    )
+    action = models.CharField(
+        max_length=10,
+        choices=ACTIONS,
+        verbose_name="Действие",
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата изменения",
+    )
+
+    class Meta:
+        ordering = ('id', )
+        verbose_name = "Изменение"
+        verbose_name_plural = "Изменения"
+        indexes = [
+            models.Index(fields=['model', 'id'], name='change_model_seq'),
+            models.Index(fields=['model', 'object_id', 'id'],
+                         name='change_model_object'),
+        ]
+
+    def __str__(self):
+        return f'{self.id}: {self.action} {self.model} {self.object_id}'
+
+
+def export_upload_to(instance, filename):
+    """
+    Файлы выгрузок лежат в каталогах со случайными именами:
+    отдаются они только владельцу через API, а имя не должно
+    угадываться по номеру задания.
+    """
+    return f'exports/{uuid.uuid4().hex}/{filename}'
+
+
+class ExportJob(models.Model):
+    """Создание модели задания на выгрузку файла."""
+
+    SHOPPING_LIST = 'shopping_list'
+    MY_RECIPES = 'my_recipes'
+    FAVORITES = 'favorites'
+
+    KINDS = (
+        (SHOPPING_LIST, 'Список покупок'),
+        (MY_RECIPES, 'Мои рецепты'),
+        (FAVORITES, 'Избранные рецепты'),
+    )
+
+    TXT = 'txt'
+    CSV = 'csv'
+
+    FORMATS = (
+        (TXT, 'Текст'),
+        (CSV, 'CSV'),
+    )
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Формируется'),
+        (SUCCESS, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="export_jobs",
+        verbose_name="Пользователь",
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=KINDS,
+        verbose_name="Тип выгрузки",
+    )
+    format = models.CharField(
+        max_length=10,
+        choices=FORMATS,
+        default=TXT,
+        verbose_name="Формат",
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name="Статус",
+    )
+    file = models.FileField(
+        upload_to=export_upload_to,
+        blank=True,
+        verbose_name="Файл",
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="Ошибка",
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата создания",
+    )
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Дата завершения",
+    )
+
+    class Meta:
+        ordering = ('-created', )
+        verbose_name = "Выгрузка"
+        verbose_name_plural = "Выгрузки"
+
+    def __str__(self):
+        return f'{self.get_kind_display()} для {self.user} ({self.status})'
+
+
+class SimilarRecipe(models.Model):
+    """
+    Создание модели похожего рецепта.
+    Для каждого рецепта хранятся K наиболее похожих рецептов
+    по взаимодействиям пользователей, rank - место в списке.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="similar_recipes",
+        verbose_name="Рецепт",
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Похожий рецепт",
+    )
+    score = models.FloatField(
+        verbose_name="Сходство",
+    )
+    rank = models.PositiveSmallIntegerField(
+        verbose_name="Место",
+    )
+
+    class Meta:
+        ordering = ('recipe', 'rank')
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'rank'],
+                name='unique_similar_rank'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.similar_id} похож на {self.recipe_id}'
+
+
+class RecipeSignature(models.Model):
+    """
+    Создание модели MinHash-сигнатуры рецепта по набору
+    его ингредиентов.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="signature",
+        verbose_name="Рецепт",
+    )
+    signature = models.BinaryField(
+        verbose_name="Сигнатура",
+    )
+
+    class Meta:
+        verbose_name = "Сигнатура рецепта"
+        verbose_name_plural = "Сигнатуры рецептов"
+
+    def __str__(self):
+        return f'Сигнатура рецепта {self.recipe_id}'
+
+
+class RecipeBucket(models.Model):
+    """
+    Создание модели корзины LSH-индекса: рецепты с одинаковой
+    полосой сигнатуры попадают в одну корзину.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="buckets",
+        verbose_name="Рецепт",
+    )
+    band = models.PositiveSmallIntegerField(
+        verbose_name="Полоса",
+    )
+    bucket = models.BigIntegerField(
+        verbose_name="Корзина",
+    )
+
+    class Meta:
+        verbose_name = "Корзина LSH"
+        verbose_name_plural = "Корзины LSH"
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='lsh_band_bucket'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.band}/{self.bucket}'
+
+
+class TrendingState(models.Model):
+    """
+    Создание модели состояния рейтинга популярности.
+    Вклад события в популярность рецепта равен
+    вес * exp(lambda * (t - epoch)), поэтому старые события
+    не нужно пересчитывать: их относительный вклад убывает сам.
+    """
+
+    epoch = models.FloatField(
+        verbose_name="Начало отсчёта, секунды Unix",
+    )
+
+    class Meta:
+        verbose_name = "Состояние рейтинга популярности"
+        verbose_name_plural = "Состояние рейтинга популярности"
+
+    def __str__(self):
+        return f'Начало отсчёта {self.epoch}'
@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from foodgram.events import publish_on_commit
+from users.counters import adjust_counters
+
+from . import trending
+from .models import Change, Favorite, Ingredient, Recipe, ShoppingCart, Tag
+
+User = get_user_model()
+
+VERSIONED_MODELS = (Recipe, Tag, Ingredient, User)
+UNLOGGED_FIELDS = frozenset(('last_login',))
+
+
+def log_changes(model, object_ids, action=Change.UPSERT):
+    """Записывает изменения объектов модели в журнал."""
+    Change.objects.bulk_create(
+        Change(model=model._meta.label_lower, object_id=object_id,
+               action=action)
+        for object_id in object_ids
+    )
+
+
+def on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Дата входа не отдаётся клиентам, и вход не попадает в журнал.
+    if raw or (update_fields and update_fields <= UNLOGGED_FIELDS):
+        return
+    log_changes(sender, (instance.pk,))
+
+
+def on_delete(sender, instance, **kwargs):
+    # Помеченные удалёнными строки попали в журнал при пометке.
+    if getattr(instance, 'deleted_at', None) is None:
+        log_changes(sender, (instance.pk,), Change.DELETE)
+
+
+for model in VERSIONED_MODELS:
+    label = model._meta.label_lower
+    post_save.connect(on_save, sender=model,
+                      dispatch_uid=f'change_save_{label}')
+    post_delete.connect(on_delete, sender=model,
+                        dispatch_uid=f'change_delete_{label}')
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Изменение тегов рецепта обновляет updated_at рецепта
+    и попадает в журнал изменений.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        recipe_ids = [instance.pk]
+    elif pk_set:
+        recipe_ids = list(pk_set)
+    else:
+        return
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        updated_at=timezone.now())
+    log_changes(Recipe, recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, raw=False, **kwargs):
+    """Новый рецепт увеличивает счётчик рецептов автора."""
+    if created and not raw:
+        adjust_counters(User, instance.author_id, recipes_count=1)
+        event = {
+            'type': 'new_recipe',
+            'recipe': {'id': instance.pk, 'name': instance.name,
+                       'author': instance.author_id},
+        }
+        publish_on_commit(
+            lambda: (f'author:{instance.author_id}', event))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """
+    Удаление рецепта уменьшает счётчик рецептов автора; для
+    помеченного удалённым рецепта счётчик уменьшен при пометке.
+    """
+    if instance.deleted_at is None:
+        adjust_counters(User, instance.author_id, recipes_count=-1)
+
+
+def favorites_count_event(recipe_id):
+    """Событие с новым количеством добавлений рецепта в избранное."""
+    row = Recipe.objects.filter(pk=recipe_id).annotate(
+        count=Count('favorites')).values_list('author_id', 'count').first()
+    if row is None:
+        return None
+    author_id, count = row
+    return f'author:{author_id}', {
+        'type': 'favorites_count', 'recipe': recipe_id, 'count': count}
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(sender, instance, created=True, raw=False, **kwargs):
+    """Подписчики автора получают новое количество добавлений."""
+    if created and not raw:
+        publish_on_commit(lambda: favorites_count_event(instance.recipe_id))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def trending_event(sender, instance, created, raw=False, **kwargs):
+    """
+    Добавление в избранное или корзину повышает популярность рецепта.
+    Удаления не учитываются: вклад события со временем затухает сам.
+    """
+    if created and not raw:
+        trending.bump(instance.recipe_id,
+                      settings.TRENDING_WEIGHTS[sender._meta.model_name])
@@ -0,0 +1,63 @@
+"""
+Рейтинг популярности рецептов с экспоненциальным затуханием.
+Каждое добавление в избранное или корзину увеличивает
+trending_score рецепта одним UPDATE на вес события,
+умноженный на exp(lambda * (t - epoch)). Периодическое
+перемасштабирование переносит epoch на текущий момент и умножает
+все оценки на одинаковый множитель, поэтому порядок рецептов
+не меняется и значения не переполняются. Его раз в сутки ставит
+в очередь воркер задач (TASKS_SCHEDULE).
+"""
+import math
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Coalesce, Exp
+
+from .models import Recipe, TrendingState
+
+# Оценки меньше этого значения после перемасштабирования обнуляются.
+MIN_SCORE = 1e-9
+
+
+def decay_rate():
+    """Коэффициент lambda из периода полураспада, 1/с."""
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def bump(recipe_id, weight):
+    """
+    Увеличивает оценку рецепта. Начало отсчёта читается
+    подзапросом в том же UPDATE, а не кешируется в процессе.
+    """
+    epoch = Subquery(TrendingState.objects.values('epoch')[:1])
+    now = time.time()
+    Recipe.objects.filter(pk=recipe_id).update(
+        trending_score=F('trending_score') + Value(weight) * Exp(
+            Value(decay_rate()) * (Value(now) - Coalesce(epoch, Value(now)))
+        )
+    )
+
+
+@transaction.atomic
+def rescale():
+    """
+    Переносит начало отсчёта на текущий момент. Возвращает
+    множитель, на который умножены оценки. Добавления, выполняемые
+    одновременно с перемасштабированием, могут учесться со старым
+    началом отсчёта, поэтому его запускают редко.
+    """
+    state, _ = TrendingState.objects.select_for_update().get_or_create(
+        pk=1, defaults={'epoch': time.time()})
+    now = time.time()
+    factor = math.exp(-decay_rate() * (now - state.epoch))
+    Recipe.objects.filter(
+        trending_score__gt=0, trending_score__lt=MIN_SCORE / factor
+    ).update(trending_score=0)
+    Recipe.objects.filter(trending_score__gt=0).update(
+        trending_score=F('trending_score') * factor)
+    state.epoch = now
+    state.save(update_fields=('epoch',))
+    return factor
@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """Модель фоновых задач в админке."""
+
+    list_display = ('id', 'name', 'status', 'attempts', 'created',
+                    'finished')
+    list_filter = ('status',)
+    search_fields = ('name',)
+    readonly_fields = ('created', 'finished')
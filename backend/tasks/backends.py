@@ -0,0 +1,198 @@
+"""
+Бэкенды очереди задач. Бэкенд выбирается настройкой TASKS_BACKEND;
+сторонний брокер подключается классом с методом
+enqueue(name, args, kwargs, max_retries).
+"""
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_backend = None
+
+
+def get_backend():
+    """Возвращает экземпляр бэкенда из настройки TASKS_BACKEND."""
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.TASKS_BACKEND)()
+    return _backend
+
+
+def execute(task_id):
+    """
+    Выполняет задачу из базы данных и сохраняет результат.
+    При ошибке задача возвращается в очередь с экспоненциальной
+    задержкой, пока не исчерпаны повторы.
+    """
+    from .registry import get_task
+
+    task = Task.objects.get(pk=task_id)
+    retry_delay = 0
+    try:
+        func = get_task(task.name)
+        retry_delay = func.retry_delay
+        result = func(*task.args, **task.kwargs)
+    except Exception:
+        logger.exception('Задача %s #%s завершилась ошибкой',
+                         task.name, task.id)
+        task.error = traceback.format_exc()
+        if task.attempts <= task.max_retries:
+            delay = retry_delay * 2 ** max(task.attempts - 1, 0)
+            task.status = Task.PENDING
+            task.run_after = timezone.now() + timedelta(seconds=delay)
+        else:
+            task.status = Task.FAILED
+            task.finished = timezone.now()
+    else:
+        task.status = Task.SUCCESS
+        task.result = result
+        task.error = ''
+        task.finished = timezone.now()
+    task.locked_until = None
+    task.save(update_fields=('status', 'result', 'error', 'run_after',
+                             'finished', 'locked_until'))
+    return task.status
+
+
+class DatabaseBackend:
+    """
+    Очередь в таблице Task. Задачи выполняет команда run_tasks_worker,
+    брокер не нужен.
+    """
+
+    def enqueue(self, name, args, kwargs, max_retries):
+        return Task.objects.create(name=name, args=list(args),
+                                   kwargs=kwargs, max_retries=max_retries)
+
+    def enqueue_due(self, schedule):
+        """
+        Ставит в очередь периодические задачи из schedule (имя задачи -
+        интервал, с), которые не ставились в очередь дольше интервала
+        и не ожидают выполнения. Воркеры, проверившие расписание
+        одновременно, изредка ставят задачу дважды, поэтому
+        периодические задачи должны быть идемпотентны.
+        """
+        from .registry import get_task
+
+        now = timezone.now()
+        queued = []
+        for name, interval in schedule.items():
+            if Task.objects.filter(name=name).filter(
+                Q(created__gt=now - timedelta(seconds=interval))
+                | Q(status__in=(Task.PENDING, Task.RUNNING))
+            ).exists():
+                continue
+            self.enqueue(name, (), {}, get_task(name).max_retries)
+            queued.append(name)
+        return queued
+
+    @staticmethod
+    def lease_end():
+        return timezone.now() + timedelta(
+            seconds=settings.TASKS_LEASE_SECONDS)
+
+    def claim(self, limit):
+        """
+        Забирает до limit готовых к выполнению задач. Строки
+        блокируются с SKIP LOCKED, поэтому воркеры не мешают друг другу.
+        Задача захватывается на TASKS_LEASE_SECONDS; выполняющиеся
+        задачи с истёкшим захватом (воркер остановился аварийно)
+        забираются повторно, пока не исчерпаны повторы.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(Task.objects.select_for_update(
+                skip_locked=True
+            ).filter(
+                Q(status=Task.PENDING, run_after__lte=now)
+                | Q(status=Task.RUNNING, locked_until__lt=now)
+            ).order_by('id').values_list(
+                'id', 'status', 'attempts', 'max_retries')[:limit])
+            ids = []
+            for task_id, status, attempts, max_retries in rows:
+                if status == Task.RUNNING and attempts > max_retries:
+                    self.fail(task_id, 'Истёк срок захвата задачи воркером.')
+                    continue
+                Task.objects.filter(pk=task_id).update(
+                    status=Task.RUNNING,
+                    attempts=F('attempts') + 1,
+                    locked_until=self.lease_end())
+                ids.append(task_id)
+        return ids
+
+    def extend(self, task_ids):
+        """Продлевает захват выполняющихся задач."""
+        Task.objects.filter(pk__in=task_ids, status=Task.RUNNING).update(
+            locked_until=self.lease_end())
+
+    @staticmethod
+    def fail(task_id, error):
+        """Отмечает ошибкой задачу, которую не удалось выполнить."""
+        Task.objects.filter(pk=task_id, status=Task.RUNNING).update(
+            status=Task.FAILED, error=error, finished=timezone.now(),
+            locked_until=None)
+
+
+class ThreadBackend(DatabaseBackend):
+    """
+    Выполняет задачи в пуле потоков текущего процесса сразу после
+    фиксации транзакции. Подходит для разработки: отдельный воркер
+    не нужен, но задачи теряются при остановке процесса.
+    """
+
+    executor = ThreadPoolExecutor(
+        max_workers=getattr(settings, 'TASKS_THREADS', 2),
+        thread_name_prefix='tasks')
+
+    def enqueue(self, name, args, kwargs, max_retries):
+        task = super().enqueue(name, args, kwargs, max_retries)
+        transaction.on_commit(
+            lambda: self.executor.submit(self.run, task.pk))
+        return task
+
+    def run(self, task_id):
+        close_old_connections()
+        try:
+            Task.objects.filter(pk=task_id).update(
+                status=Task.RUNNING, attempts=F('attempts') + 1)
+            if execute(task_id) == Task.PENDING:
+                self.schedule_retry(task_id)
+        finally:
+            close_old_connections()
+
+    def schedule_retry(self, task_id):
+        task = Task.objects.get(pk=task_id)
+        delay = max((task.run_after - timezone.now()).total_seconds(), 0)
+        timer = threading.Timer(
+            delay, self.executor.submit, args=(self.run, task_id))
+        timer.daemon = True
+        timer.start()
+
+
+class ImmediateBackend(DatabaseBackend):
+    """
+    Выполняет задачу синхронно в момент постановки в очередь,
+    повторы - сразу, без задержки.
+    """
+
+    def enqueue(self, name, args, kwargs, max_retries):
+        task = super().enqueue(name, args, kwargs, max_retries)
+        status = Task.PENDING
+        while status == Task.PENDING:
+            Task.objects.filter(pk=task.pk).update(
+                status=Task.RUNNING, attempts=F('attempts') + 1)
+            status = execute(task.pk)
+        task.refresh_from_db()
+        return task
@@ -0,0 +1,115 @@
+import logging
+import signal
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from tasks.backends import DatabaseBackend, execute
+
+logger = logging.getLogger(__name__)
+
+# Интервал проверки расписания периодических задач, с.
+SCHEDULE_INTERVAL = 60
+
+
+def init_process():
+    """Остановку по Ctrl+C обрабатывает только родительский процесс."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run(task_id):
+    close_old_connections()
+    try:
+        return execute(task_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди в базе данных в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2,
+                            help='Количество процессов-исполнителей.')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Пауза между опросами пустой очереди, с.')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи и завершиться.')
+
+    def create_pool(self, processes):
+        return ProcessPoolExecutor(max_workers=processes,
+                                   initializer=init_process)
+
+    def collect(self, backend, done, running):
+        """
+        Выводит результаты завершившихся задач. Ошибка исполнителя,
+        например аварийно завершённый процесс, отмечает задачу
+        ошибкой и не останавливает воркер. Возвращает True, если
+        пул процессов нужно пересоздать.
+        """
+        broken = False
+        for future in done:
+            task_id = running.pop(future)
+            try:
+                self.stdout.write(f'Задача #{task_id}: {future.result()}')
+            except Exception as error:
+                logger.exception('Исполнитель задачи #%s завершился '
+                                 'ошибкой', task_id)
+                backend.fail(task_id, ''.join(traceback.format_exception(
+                    type(error), error, error.__traceback__)))
+                broken = broken or isinstance(error, BrokenProcessPool)
+        return broken
+
+    def enqueue_scheduled(self, backend):
+        for name in backend.enqueue_due(settings.TASKS_SCHEDULE):
+            self.stdout.write(f'Периодическая задача {name} '
+                              'поставлена в очередь')
+
+    def handle(self, *args, **options):
+        backend = DatabaseBackend()
+        processes = options['processes']
+        poll_interval = options['poll_interval']
+        heartbeat_interval = settings.TASKS_LEASE_SECONDS / 3
+        connections.close_all()
+        running = {}
+        pool = self.create_pool(processes)
+        last_heartbeat = last_schedule = time.monotonic()
+        self.enqueue_scheduled(backend)
+        try:
+            while True:
+                if time.monotonic() - last_schedule >= SCHEDULE_INTERVAL:
+                    self.enqueue_scheduled(backend)
+                    last_schedule = time.monotonic()
+                if len(running) < processes:
+                    task_ids = backend.claim(processes - len(running))
+                    # Соединение закрывается до fork исполнителей,
+                    # чтобы они не унаследовали его.
+                    connections.close_all()
+                    for task_id in task_ids:
+                        running[pool.submit(run, task_id)] = task_id
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                done, _ = wait(running, timeout=poll_interval,
+                               return_when=FIRST_COMPLETED)
+                if self.collect(backend, done, running):
+                    # Упавший процесс ломает весь пул: задачи, которые
+                    # в нём оставались, тоже завершаются ошибкой.
+                    done, _ = wait(running)
+                    self.collect(backend, done, running)
+                    pool.shutdown(wait=False)
+                    pool = self.create_pool(processes)
+                if running and (time.monotonic() - last_heartbeat
+                                >= heartbeat_interval):
+                    backend.extend(list(running.values()))
+                    last_heartbeat = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write('Ожидание выполняющихся задач...')
+        finally:
+            pool.shutdown(wait=True)
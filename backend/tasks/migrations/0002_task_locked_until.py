@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Захвачена воркером до'),
+        ),
+    ]
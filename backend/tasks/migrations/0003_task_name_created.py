@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-19 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_locked_until'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['name', 'created'], name='task_name_created'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Создание модели фоновой задачи."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (SUCCESS, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        max_length=150,
+        verbose_name="Имя задачи",
+    )
+    args = models.JSONField(
+        default=list,
+        verbose_name="Позиционные аргументы",
+    )
+    kwargs = models.JSONField(
+        default=dict,
+        verbose_name="Именованные аргументы",
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name="Статус",
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество попыток",
+    )
+    max_retries = models.PositiveIntegerField(
+        default=3,
+        verbose_name="Максимум повторов",
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Выполнить не раньше",
+    )
+    result = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name="Результат",
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="Ошибка",
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата создания",
+    )
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Дата завершения",
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Захвачена воркером до",
+    )
+
+    class Meta:
+        ordering = ('id', )
+        verbose_name = "Задача"
+        verbose_name_plural = "Задачи"
+        indexes = [
+            models.Index(fields=['status', 'run_after'],
+                         name='task_queue'),
+            models.Index(fields=['name', 'created'],
+                         name='task_name_created'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.id} ({self.status})'
@@ -0,0 +1,52 @@
+"""
+Реестр фоновых задач.
+
+Задача объявляется декоратором в модуле tasks.py приложения:
+
+    @task(max_retries=5)
+    def build_report(user_id):
+        ...
+
+и ставится в очередь вызовом build_report.delay(user_id).
+Аргументы и результат должны сериализоваться в JSON.
+"""
+from .backends import get_backend
+
+registry = {}
+
+
+class TaskNotRegistered(KeyError):
+    """Задача с таким именем не зарегистрирована."""
+
+
+def task(name=None, max_retries=3, retry_delay=10):
+    """
+    Регистрирует функцию как фоновую задачу.
+    retry_delay - задержка перед первым повтором в секундах,
+    каждый следующий повтор откладывается вдвое дольше.
+    """
+
+    def decorator(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_retries = max_retries
+        func.retry_delay = retry_delay
+        func.delay = lambda *args, **kwargs: enqueue(
+            func.task_name, *args, **kwargs)
+        registry[func.task_name] = func
+        return func
+
+    return decorator
+
+
+def get_task(name):
+    """Возвращает функцию задачи по имени."""
+    try:
+        return registry[name]
+    except KeyError:
+        raise TaskNotRegistered(name)
+
+
+def enqueue(name, *args, **kwargs):
+    """Ставит задачу в очередь текущего бэкенда."""
+    func = get_task(name)
+    return get_backend().enqueue(name, args, kwargs, func.max_retries)
@@ -1,10 +1,24 @@
 from django.contrib import admin
+from foodgram.admin_utils import InputFilter, LargeTableAdmin, SoftDeleteAdmin
+from recipes.deletion import soft_delete_users
 
 from .models import Subscription, User
 
 
+class FollowerFilter(InputFilter):
+    title = 'подписчику'
+    parameter_name = 'user'
+    lookup = 'user__username'
+
+
+class AuthorFilter(InputFilter):
+    title = 'автору'
+    parameter_name = 'author'
+    lookup = 'author__username'
+
+
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(SoftDeleteAdmin):
     list_display = (
         'id',
         'username',
@@ -14,13 +28,18 @@ class UserAdmin(admin.ModelAdmin):
         'last_name',
         'password',
     )
-    search_fields = ('email', 'username')
-    list_filter = ('email', 'username')
+    search_fields = ('^email', '^username')
+    list_filter = ('role',)
     empty_value_display = '-пусто-'
 
+    def mark_deleted(self, queryset):
+        soft_delete_users(queryset)
+
 
 @admin.register(Subscription)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ('id', 'user', 'author')
-    list_filter = ('user', 'author')
+    list_select_related = ('user', 'author')
+    list_filter = (FollowerFilter, AuthorFilter)
+    raw_id_fields = ('user', 'author')
     empty_value_display = '-пусто-'
@@ -0,0 +1,92 @@
+"""
+Денормализованные счётчики пользователя: рецепты, подписчики
+и подписки. Обновляются атомарно выражениями F() в том же
+UPDATE, что и дата изменения профиля.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Счётчик: (источник, поле пользователя, поле второй стороны подписки).
+COUNTERS = {
+    'recipes_count': ('recipes', 'author', None),
+    'followers_count': ('subscription', 'author', 'user'),
+    'following_count': ('subscription', 'user', 'author'),
+}
+
+# Отправляется после UPDATE пользователей в обход save(): ids.
+users_updated = Signal()
+
+
+def adjust_counters(user_model, user_id, **deltas):
+    """Изменяет счётчики пользователя на заданные величины."""
+    user_model.objects.filter(pk=user_id).update(
+        updated_at=timezone.now(),
+        **{name: F(name) + delta for name, delta in deltas.items()},
+    )
+    users_updated.send(sender=user_model, ids=(user_id,))
+
+
+def release_subscriptions(user_model, subscription_model, user_ids):
+    """
+    Уменьшает счётчики подписок и подписчиков остальных
+    пользователей на подписки, связывающие их с удаляемыми
+    user_ids. Сами подписки удаляются позже фоновой задачей.
+    """
+    for name, (source, field, other) in COUNTERS.items():
+        if source != 'subscription':
+            continue
+        rows = subscription_model.objects.filter(
+            **{f'{other}_id__in': user_ids})
+        released = rows.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(total=Count('pk'))
+        ids = list(user_model.objects.filter(
+            pk__in=rows.values(field)
+        ).exclude(pk__in=user_ids).values_list('pk', flat=True))
+        user_model.objects.filter(pk__in=ids).update(
+            updated_at=timezone.now(),
+            **{name: F(name) - Subquery(released.values('total'))},
+        )
+        users_updated.send(sender=user_model, ids=ids)
+
+
+def has_soft_delete(model):
+    # Исторические модели ранних миграций ещё без deleted_at.
+    return any(field.name == 'deleted_at' for field in model._meta.fields)
+
+
+def counter_subqueries(user_model, recipe_model, subscription_model):
+    """
+    Подзапросы с фактическими значениями счётчиков. Подписки
+    на удалённых пользователей и от них не учитываются.
+    """
+    models = {'recipes': recipe_model, 'subscription': subscription_model}
+    subqueries = {}
+    for name, (source, field, other) in COUNTERS.items():
+        rows = models[source].objects.filter(**{field: OuterRef('pk')})
+        if other is not None and has_soft_delete(user_model):
+            rows = rows.filter(**{f'{other}__deleted_at__isnull': True})
+        rows = rows.order_by().values(field).annotate(total=Count('pk'))
+        subqueries[name] = Coalesce(
+            Subquery(rows.values('total')), Value(0))
+    return subqueries
+
+
+def reconcile_counters(user_model, recipe_model, subscription_model):
+    """
+    Пересчитывает счётчики всех пользователей и возвращает
+    количество исправленных строк.
+    """
+    actual = counter_subqueries(user_model, recipe_model, subscription_model)
+    drifted = user_model.objects.annotate(
+        **{f'actual_{name}': expression
+           for name, expression in actual.items()}
+    ).exclude(**{name: F(f'actual_{name}') for name in COUNTERS})
+    ids = list(drifted.values_list('pk', flat=True))
+    if ids:
+        user_model.objects.filter(pk__in=ids).update(
+            updated_at=timezone.now(), **actual)
+        users_updated.send(sender=user_model, ids=ids)
+    return len(ids)
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+from users.counters import reconcile_counters
+
+
+def fill_counters(apps, schema_editor):
+    reconcile_counters(
+        apps.get_model('users', 'User'),
+        apps.get_model('recipes', 'Recipe'),
+        apps.get_model('users', 'Subscription'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_exportjob'),
+        ('users', '0002_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Количество подписок'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
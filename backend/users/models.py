@@ -1,9 +1,16 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 
 from .validators import validate_username
 
 
+class ActiveUserManager(UserManager):
+    """Пользователи без помеченных на удаление."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class User(AbstractUser):
     """Создание модели пользователя."""
 
@@ -53,6 +60,36 @@ class User(AbstractUser):
         default=False,
         verbose_name="Подписка на пользователя"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Дата изменения'
+    )
+    recipes_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+    followers_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
+    following_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписок'
+    )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name='Дата удаления'
+    )
+
+    objects = ActiveUserManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = "Пользователь"
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from foodgram.events import publish_on_commit
+
+from .counters import adjust_counters
+from .models import Subscription, User
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, raw=False, **kwargs):
+    """Подписка увеличивает счётчики автора и подписчика."""
+    if created and not raw:
+        adjust_counters(User, instance.author_id, followers_count=1)
+        adjust_counters(User, instance.user_id, following_count=1)
+        publish_on_commit(lambda: (
+            f'user:{instance.user_id}',
+            {'type': 'subscribed', 'author': instance.author_id}))
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    """
+    Отписка уменьшает счётчики автора и подписчика. Подписки
+    удалённого пользователя уже вычтены из счётчиков при пометке
+    его удалённым, и фоновое удаление счётчики не меняет.
+    """
+    if User.all_objects.filter(
+            pk__in=(instance.user_id, instance.author_id),
+            deleted_at__isnull=False).exists():
+        return
+    adjust_counters(User, instance.author_id, followers_count=-1)
+    adjust_counters(User, instance.user_id, following_count=-1)
+    publish_on_commit(lambda: (
+        f'user:{instance.user_id}',
+        {'type': 'unsubscribed', 'author': instance.author_id}))
@@ -0,0 +1,12 @@
+import pytest
+from django.core.cache import cache
+from foodgram.routers import replica_lag_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    replica_lag_cache.clear()
+    cache.clear()
+    yield
+    replica_lag_cache.clear()
+    cache.clear()
@@ -0,0 +1,31 @@
+"""
+Настройки для тестов: основная база и одна реплика, обе SQLite.
+Тестовая база создаётся в памяти, а исходные файлы баз, к которым
+Django может подключиться до её создания, лежат во временном
+каталоге, а не в дереве исходников.
+"""
+import os
+import tempfile
+
+from foodgram.settings import *  # noqa: F401,F403
+
+TEST_DB_DIR = tempfile.gettempdir()
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(TEST_DB_DIR, 'foodgram_primary.sqlite3'),
+    },
+    'replica_0': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(TEST_DB_DIR, 'foodgram_replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DB_REPLICAS = ['replica_0']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
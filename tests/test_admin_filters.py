@@ -0,0 +1,38 @@
+import pytest
+from django.contrib.messages import get_messages
+from recipes.models import Favorite, Ingredient, Recipe
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def no_replicas(settings):
+    # Админка читает с основной базы, без реплики.
+    settings.DB_REPLICAS = []
+
+
+@pytest.fixture
+def favorite(admin_user):
+    recipe = Recipe.objects.create(
+        author=admin_user, name='Рецепт', text='Текст',
+        image='recipes/images/0.jpg', cooking_time=10)
+    recipe.ingredients.add(
+        Ingredient.objects.create(name='Соль', measurement_unit='г'))
+    return Favorite.objects.create(user=admin_user, recipe=recipe)
+
+
+class TestInputFilter:
+
+    def test_filters_by_recipe_id(self, admin_client, favorite):
+        response = admin_client.get(
+            '/admin/recipes/favorite/', {'recipe': favorite.recipe_id})
+        assert response.status_code == 200
+        assert list(response.context['cl'].result_list) == [favorite]
+
+    def test_ignores_non_numeric_recipe_id(self, admin_client, favorite):
+        response = admin_client.get(
+            '/admin/recipes/favorite/', {'recipe': 'abc'})
+        assert response.status_code == 200
+        assert list(response.context['cl'].result_list) == [favorite]
+        assert any('abc' in str(message)
+                   for message in get_messages(response.wsgi_request))
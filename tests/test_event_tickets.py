@@ -0,0 +1,59 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core import signing
+from foodgram import sse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(
+        username='cook', email='cook@example.com', password='secret-1')
+
+
+def scope(query=b'', headers=()):
+    return {'type': 'http', 'path': '/api/events/', 'query_string': query,
+            'headers': list(headers)}
+
+
+class TestEventTickets:
+
+    def test_ticket_requires_authentication(self):
+        response = APIClient().post('/api/events/ticket/')
+        assert response.status_code == 401
+
+    def test_ticket_opens_stream_once(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        ticket = client.post('/api/events/ticket/').data['ticket']
+        query = f'ticket={ticket}'.encode()
+        assert sse.load_viewer(scope(query))[0] == user
+        assert sse.load_viewer(scope(query))[0] is None
+
+    def test_expired_ticket(self, user, settings):
+        ticket = sse.issue_ticket(user)
+        settings.EVENTS_TICKET_TTL = -1
+        assert sse.redeem_ticket(ticket) is None
+
+    def test_foreign_signature(self, user):
+        ticket = signing.dumps({'user': user.pk, 'nonce': 'x'})
+        assert sse.redeem_ticket(ticket) is None
+
+    def test_inactive_user(self, user):
+        ticket = sse.issue_ticket(user)
+        user.is_active = False
+        user.save()
+        query = f'ticket={ticket}'.encode()
+        assert sse.load_viewer(scope(query))[0] is None
+
+    def test_token_only_in_header(self, user):
+        token = Token.objects.create(user=user)
+        query = f'token={token.key}'.encode()
+        header = (b'authorization', f'Token {token.key}'.encode())
+        assert sse.load_viewer(scope(query))[0] is None
+        assert sse.load_viewer(scope(headers=(header,)))[0] == user
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+from api import fastpath
+from api.serializers import RecipeGetSerializer
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from recipes.models import (Favorite, Ingredient, Recipe, RecipesIngredients,
+                            Tag)
+from rest_framework.request import Request
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def recipes():
+    author = User.objects.create_user(
+        username='cook', email='cook@example.com', password='secret-1')
+    tags = [Tag.objects.create(name=f'Тег {number}', color=f'#00000{number}',
+                               slug=f'tag-{number}')
+            for number in range(3)]
+    ingredients = [
+        Ingredient.objects.create(name=f'Ингредиент {number}',
+                                  measurement_unit='г')
+        for number in range(3)]
+    recipes = []
+    for number in range(3):
+        recipe = Recipe.objects.create(
+            author=author, name=f'Рецепт {number}', text='Текст',
+            image=f'recipes/images/{number}.jpg', cooking_time=10)
+        # Теги добавляются не по порядку id, чтобы порядок строк
+        # таблицы связи отличался от порядка тегов.
+        for tag in reversed(tags[number:]):
+            recipe.tags.add(tag)
+        for ingredient in ingredients[:number + 1]:
+            RecipesIngredients.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=number + 1)
+        recipes.append(recipe)
+    Favorite.objects.create(user=author, recipe=recipes[0])
+    return author
+
+
+def as_json(data):
+    return json.loads(json.dumps(data))
+
+
+@pytest.mark.parametrize('authenticated', (False, True))
+@pytest.mark.parametrize('fields', (None, {'id', 'tags', 'is_favorited'}))
+def test_fast_path_matches_serializer(recipes, authenticated, fields):
+    request = Request(RequestFactory().get('/api/recipes/'))
+    if authenticated:
+        request.user = recipes
+    queryset = Recipe.objects.with_user_state(request.user)
+
+    fast = fastpath.recipe_rows(
+        fastpath.recipe_values(queryset, fields), request, fields)
+    serialized = RecipeGetSerializer(
+        queryset.select_related('author').prefetch_related(
+            'tags', 'recipes_ingredients__ingredient'),
+        many=True, fields=fields, context={'request': request}).data
+
+    assert as_json(fast) == as_json(serialized)
@@ -0,0 +1,18 @@
+import pytest
+from api.tasks import import_ingredients
+from recipes.models import Ingredient
+
+pytestmark = pytest.mark.django_db
+
+
+def test_counts_skipped_rows(tmp_path):
+    Ingredient.objects.create(name='соль', measurement_unit='г')
+    path = tmp_path / 'ingredients.csv'
+    path.write_text('name,measurement_unit\n'
+                    'соль,г\n'
+                    'сахар,г\n'
+                    'сахар,г\n'
+                    'мука\n', encoding='utf-8')
+
+    assert import_ingredients(str(path)) == {'created': 1, 'existing': 2}
+    assert Ingredient.objects.count() == 2
@@ -0,0 +1,179 @@
+import time
+
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from foodgram import routers
+from foodgram.middleware import ReplicaRoutingMiddleware
+from foodgram.routers import PrimaryReplicaRouter, read_from_replica
+from recipes.models import Tag
+
+REPLICA = 'replica_0'
+
+
+@pytest.fixture
+def router():
+    return PrimaryReplicaRouter()
+
+
+@pytest.fixture
+def replica_reads():
+    token = read_from_replica.set(True)
+    yield
+    read_from_replica.reset(token)
+
+
+def routed_view(status=200):
+    """
+    Представление, запоминающее базу, которую роутер выбрал
+    для чтения во время запроса.
+    """
+    seen = {}
+
+    def view(request):
+        seen['read_db'] = PrimaryReplicaRouter().db_for_read(Tag)
+        return HttpResponse(status=status)
+
+    return view, seen
+
+
+class TestPrimaryReplicaRouter:
+
+    def test_read_defaults_to_primary(self, router):
+        assert router.db_for_read(Tag) == DEFAULT_DB_ALIAS
+
+    @pytest.mark.usefixtures('replica_reads')
+    def test_read_goes_to_replica(self, router):
+        assert router.db_for_read(Tag) == REPLICA
+
+    @pytest.mark.usefixtures('replica_reads')
+    def test_write_goes_to_primary_and_pins_reads(self, router):
+        assert router.db_for_write(Tag) == DEFAULT_DB_ALIAS
+        assert router.db_for_read(Tag) == DEFAULT_DB_ALIAS
+
+    def test_migrations_only_on_primary(self, router):
+        assert router.allow_migrate(DEFAULT_DB_ALIAS, 'recipes')
+        assert not router.allow_migrate(REPLICA, 'recipes')
+
+    @pytest.mark.django_db(databases=[DEFAULT_DB_ALIAS, REPLICA])
+    @pytest.mark.usefixtures('replica_reads')
+    def test_queries_run_on_replica(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica, \
+                CaptureQueriesContext(
+                    connections[DEFAULT_DB_ALIAS]) as primary:
+            list(Tag.objects.all())
+        assert len(replica) == 1
+        assert len(primary) == 0
+
+    # Реплика не входит в databases: запрос к ней завершил бы тест
+    # ошибкой, поэтому проверка exists() идёт только по основной базе.
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures('replica_reads')
+    def test_queries_after_write_run_on_primary(self):
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast')
+        assert Tag.objects.filter(slug='breakfast').exists()
+
+
+class TestReplicaRoutingMiddleware:
+    cookie = ReplicaRoutingMiddleware.cookie_name
+
+    def test_safe_request_reads_replica(self):
+        view, seen = routed_view()
+        response = ReplicaRoutingMiddleware(view)(RequestFactory().get('/'))
+        assert seen['read_db'] == REPLICA
+        assert self.cookie not in response.cookies
+        assert read_from_replica.get() is False
+
+    def test_write_sets_pin_cookie(self, settings):
+        settings.REPLICA_STICKY_SECONDS = 10
+        view, seen = routed_view(status=201)
+        response = ReplicaRoutingMiddleware(view)(RequestFactory().post('/'))
+        assert seen['read_db'] == DEFAULT_DB_ALIAS
+        pin = response.cookies[self.cookie]
+        assert pin['max-age'] == 10
+        assert pin['httponly']
+        assert int(pin.value) >= int(time.time()) + 9
+
+    def test_failed_write_does_not_set_pin_cookie(self):
+        view, _ = routed_view(status=400)
+        response = ReplicaRoutingMiddleware(view)(RequestFactory().post('/'))
+        assert self.cookie not in response.cookies
+
+    def test_pinned_client_reads_primary(self):
+        view, seen = routed_view()
+        request = RequestFactory().get('/')
+        request.COOKIES[self.cookie] = str(int(time.time()) + 10)
+        ReplicaRoutingMiddleware(view)(request)
+        assert seen['read_db'] == DEFAULT_DB_ALIAS
+
+    def test_expired_pin_reads_replica(self):
+        view, seen = routed_view()
+        request = RequestFactory().get('/')
+        request.COOKIES[self.cookie] = str(int(time.time()) - 1)
+        ReplicaRoutingMiddleware(view)(request)
+        assert seen['read_db'] == REPLICA
+
+    def test_pin_after_write_routes_next_read_to_primary(self):
+        write_view, _ = routed_view(status=201)
+        response = ReplicaRoutingMiddleware(write_view)(
+            RequestFactory().post('/'))
+        view, seen = routed_view()
+        request = RequestFactory().get('/')
+        request.COOKIES[self.cookie] = response.cookies[self.cookie].value
+        ReplicaRoutingMiddleware(view)(request)
+        assert seen['read_db'] == DEFAULT_DB_ALIAS
+
+    def test_write_pins_authorized_client_without_cookies(self):
+        header = {'HTTP_AUTHORIZATION': 'Token 123'}
+        write_view, _ = routed_view(status=201)
+        ReplicaRoutingMiddleware(write_view)(
+            RequestFactory().post('/', **header))
+        view, seen = routed_view()
+        ReplicaRoutingMiddleware(view)(RequestFactory().get('/', **header))
+        assert seen['read_db'] == DEFAULT_DB_ALIAS
+        ReplicaRoutingMiddleware(view)(RequestFactory().get(
+            '/', HTTP_AUTHORIZATION='Token 456'))
+        assert seen['read_db'] == REPLICA
+
+
+@pytest.mark.usefixtures('replica_reads')
+class TestReplicaLag:
+
+    def test_lagging_replica_falls_back_to_primary(
+            self, router, settings, monkeypatch):
+        settings.REPLICA_MAX_LAG = 5
+        monkeypatch.setattr(routers, 'replica_lag', lambda alias: 6.0)
+        assert router.db_for_read(Tag) == DEFAULT_DB_ALIAS
+
+    def test_replica_within_max_lag_is_used(
+            self, router, settings, monkeypatch):
+        settings.REPLICA_MAX_LAG = 5
+        monkeypatch.setattr(routers, 'replica_lag', lambda alias: 5.0)
+        assert router.db_for_read(Tag) == REPLICA
+
+    def test_lag_is_cached_for_check_interval(self, router, settings):
+        settings.REPLICA_MAX_LAG = 5
+        settings.REPLICA_LAG_CHECK_INTERVAL = 60
+        routers.replica_lag_cache[REPLICA] = (time.monotonic(), 30.0)
+        assert routers.replica_lag(REPLICA) == 30.0
+        assert router.db_for_read(Tag) == DEFAULT_DB_ALIAS
+
+    def test_expired_lag_is_measured_again(self, router, settings):
+        settings.REPLICA_LAG_CHECK_INTERVAL = 1
+        routers.replica_lag_cache[REPLICA] = (time.monotonic() - 2, 30.0)
+        assert routers.replica_lag(REPLICA) == 0
+        assert router.db_for_read(Tag) == REPLICA
+
+    def test_unreachable_replica_falls_back_to_primary(
+            self, router, monkeypatch):
+        connection = connections[REPLICA]
+
+        def cursor():
+            raise OSError('replica is down')
+
+        monkeypatch.setattr(connection, 'vendor', 'postgresql')
+        monkeypatch.setattr(connection, 'cursor', cursor)
+        assert routers.replica_lag(REPLICA) == float('inf')
+        assert router.db_for_read(Tag) == DEFAULT_DB_ALIAS
@@ -0,0 +1,103 @@
+import pytest
+from api import authentication
+from api.authentication import CachedTokenAuthentication
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from recipes.deletion import soft_delete_users
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from users.counters import adjust_counters
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_cache():
+    CachedTokenAuthentication.tokens.clear()
+    CachedTokenAuthentication.users.clear()
+    yield
+    CachedTokenAuthentication.tokens.clear()
+    CachedTokenAuthentication.users.clear()
+
+
+@pytest.fixture
+def token():
+    user = User.objects.create_user(
+        username='cook', email='cook@example.com', password='secret-1')
+    return Token.objects.create(user=user)
+
+
+def authenticate(authentication_class, token):
+    request = Request(RequestFactory().get(
+        '/api/users/me/', HTTP_AUTHORIZATION=f'Token {token.key}'))
+    return authentication_class().authenticate(request)[0]
+
+
+def count_queries(authentication_class, token, repeat=3):
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(repeat):
+            user = authenticate(authentication_class, token)
+    return len(queries), user
+
+
+class TestCachedTokenAuthentication:
+
+    def test_saves_queries(self, token):
+        stock, _ = count_queries(TokenAuthentication, token)
+        cached, user = count_queries(CachedTokenAuthentication, token)
+        assert stock == 3
+        assert cached == 1
+        assert user == token.user
+
+    def test_shared_cache(self, token, monkeypatch):
+        monkeypatch.setattr(authentication, 'shared_cache_enabled',
+                            lambda: True)
+        authenticate(CachedTokenAuthentication, token)
+        CachedTokenAuthentication.tokens.clear()
+        CachedTokenAuthentication.users.clear()
+        queries, user = count_queries(CachedTokenAuthentication, token)
+        assert queries == 0
+        assert user == token.user
+
+    def test_returns_copy(self, token):
+        authenticate(CachedTokenAuthentication, token).first_name = 'Змей'
+        assert authenticate(
+            CachedTokenAuthentication, token).first_name == ''
+
+    def test_password_change(self, token):
+        authenticate(CachedTokenAuthentication, token)
+        token.user.set_password('secret-2')
+        token.user.save()
+        assert authenticate(
+            CachedTokenAuthentication, token).check_password('secret-2')
+
+    def test_deactivation(self, token):
+        authenticate(CachedTokenAuthentication, token)
+        token.user.is_active = False
+        token.user.save()
+        with pytest.raises(AuthenticationFailed):
+            authenticate(CachedTokenAuthentication, token)
+
+    def test_token_deletion(self, token):
+        authenticate(CachedTokenAuthentication, token)
+        token.delete()
+        with pytest.raises(AuthenticationFailed):
+            authenticate(CachedTokenAuthentication, token)
+
+    def test_soft_delete(self, token):
+        authenticate(CachedTokenAuthentication, token)
+        soft_delete_users(User.objects.filter(pk=token.user_id))
+        with pytest.raises(AuthenticationFailed):
+            authenticate(CachedTokenAuthentication, token)
+
+    def test_counters_update(self, token):
+        authenticate(CachedTokenAuthentication, token)
+        adjust_counters(User, token.user_id, recipes_count=1)
+        assert authenticate(
+            CachedTokenAuthentication, token).recipes_count == 1